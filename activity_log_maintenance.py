@@ -0,0 +1,64 @@
+"""Activity log retention job.
+
+Designed to be run daily via Windows Task Scheduler / cron.
+
+Rules implemented:
+- Archived log entries older than ARCHIVED_LOG_RETENTION_DAYS are deleted.
+
+Deletes run in batches of ids so each statement holds its locks briefly.
+Each batch is read in (created_at, id) order, which is the
+idx_activity_logs_archived_created_id index on (is_archived, created_at
+DESC, id DESC) scanned backwards (database/optimize_db.py), so the id
+tie-break needs no sort.
+This job is idempotent and safe to run multiple times.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+
+from app import app
+from extensions import db
+from models.user import ActivityLog
+from utils.script_logging import get_script_logger
+
+log = get_script_logger(__name__)
+
+ARCHIVED_LOG_RETENTION_DAYS = int(os.getenv('ARCHIVED_LOG_RETENTION_DAYS', 90))
+BATCH_SIZE = 5000
+
+
+def run() -> dict[str, int]:
+    cutoff = datetime.now() - timedelta(days=ARCHIVED_LOG_RETENTION_DAYS)
+    # Ids first, then DELETE ... WHERE id IN: MySQL rejects LIMIT inside an
+    # IN subquery.
+    batch = (
+        select(ActivityLog.id)
+        .where(ActivityLog.is_archived.is_(True), ActivityLog.created_at < cutoff)
+        .order_by(ActivityLog.created_at, ActivityLog.id)
+        .limit(BATCH_SIZE)
+    )
+
+    deleted_count = 0
+    with app.app_context():
+        while True:
+            ids = db.session.execute(batch).scalars().all()
+            if not ids:
+                break
+            db.session.execute(
+                delete(ActivityLog)
+                .where(ActivityLog.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            deleted_count += len(ids)
+
+    return {'deleted': deleted_count}
+
+
+if __name__ == '__main__':
+    result = run()
+    log.info(f"Deleted (archived>={ARCHIVED_LOG_RETENTION_DAYS}d): {result['deleted']}")
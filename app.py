@@ -2,37 +2,39 @@
 Vivian Cosmetic Shop - Flask Backend Application
 Main entry point
 """
+import functools
+import hashlib
+import json
 import os
 import socket
+import threading
+from datetime import datetime
 from pathlib import Path
 
-from flask import Flask, abort, jsonify, request, send_from_directory
-from dotenv import load_dotenv
-from sqlalchemy import text
-from flask_cors import CORS
-
-# Load environment variables
-# Always load `backend/.env` (if it exists) regardless of the current working
-# directory.
-#
-# IMPORTANT for production (e.g., Render): do NOT override real environment
-# variables injected by the host.
-_is_production = os.getenv('FLASK_ENV', 'development') == 'production'
-_dotenv_path = Path(__file__).resolve().parent / '.env'
-if _dotenv_path.exists():
-    load_dotenv(dotenv_path=_dotenv_path, override=(not _is_production))
-
-# Import extensions and routes
+from flask import Flask, jsonify, request, send_from_directory
+from sqlalchemy import bindparam, text
+from werkzeug.exceptions import NotFound
+from werkzeug.routing import PathConverter
+
+# Import extensions and routes.
+# `backend/.env` is loaded once by config.env when the config modules import.
 from extensions import init_extensions, db
 from config.database import SQLALCHEMY_DATABASE_URI, SQLALCHEMY_TRACK_MODIFICATIONS
 from config.settings import get_config
+from models import load_all as load_all_models
 from routes import register_blueprints
+from utils.json_provider import install_json_provider
+
+_HERE = Path(__file__).resolve().parent
+_PROJECT_ROOT = _HERE.parent
 
 
 def _get_lan_ip() -> str | None:
     """Best-effort LAN IP discovery for printing a clickable URL."""
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Hosts without a default route can stall on connect; cap the wait.
+        s.settimeout(0.1)
         # Doesn't need to be reachable; no packets are sent.
         s.connect(("8.8.8.8", 80))
         ip = s.getsockname()[0]
@@ -42,11 +44,14 @@ def _get_lan_ip() -> str | None:
         return None
 
 
+@functools.lru_cache(maxsize=1)
 def _resolve_flutter_web_build_dir() -> Path:
     """Resolve Flutter web build output directory.
 
     Defaults to `<projectRoot>/build/web`.
     Can be overridden with FLUTTER_WEB_BUILD_DIR.
+
+    Cached for the life of the process; the build dir doesn't move at runtime.
     """
     override = os.getenv("FLUTTER_WEB_BUILD_DIR")
     if override:
@@ -55,11 +60,10 @@ def _resolve_flutter_web_build_dir() -> Path:
     # Support both layouts:
     # 1) app.py at repo root (Render/GitHub backend repo)
     # 2) backend/app.py under a larger project root (original XAMPP layout)
-    here = Path(__file__).resolve().parent
     candidates = [
-        (here / "build" / "web"),
-        (here.parent / "build" / "web"),
-        (here.parent.parent / "build" / "web"),
+        (_HERE / "build" / "web"),
+        (_PROJECT_ROOT / "build" / "web"),
+        (_PROJECT_ROOT.parent / "build" / "web"),
     ]
 
     for candidate in candidates:
@@ -70,12 +74,329 @@ def _resolve_flutter_web_build_dir() -> Path:
     return candidates[0].resolve()
 
 
+# Flutter web cache policy. Files under these prefixes only change with a new
+# Flutter build and are safe to pin in the browser cache; everything else
+# (index.html, main.dart.js, flutter_service_worker.js, manifest.json, ...)
+# keeps a stable URL across deploys, so it must revalidate (cheap 304 via the
+# ETag that send_from_directory sets).
+_FLUTTER_IMMUTABLE_PREFIXES = ("assets/", "canvaskit/")
+_FLUTTER_IMMUTABLE = "public, max-age=31536000, immutable"
+_FLUTTER_NO_CACHE = "no-cache, must-revalidate"
+
+
+def _flutter_cache_control(path: str) -> str:
+    if path.startswith(_FLUTTER_IMMUTABLE_PREFIXES):
+        return _FLUTTER_IMMUTABLE
+    return _FLUTTER_NO_CACHE
+
+
+class NonApiConverter(PathConverter):
+    """Like `path`, but refuses anything under `api/` (or `api` itself)."""
+
+    regex = r"(?!api(?:/|$))[^/].*?"
+
+
+# Columns added after the initial schema shipped: (table, column, MySQL DDL).
+# Order matters within a table because of the AFTER clauses.
+_SCHEMA_PATCH_COLUMNS = [
+    ("users", "nickname", "VARCHAR(50) NULL AFTER last_name"),
+    ("users", "display_name", "VARCHAR(100) NOT NULL DEFAULT '' AFTER nickname"),
+    ("users", "address", "VARCHAR(500) NULL AFTER phone"),
+    ("users", "token_version", "INT NOT NULL DEFAULT 0 AFTER last_login"),
+    ("activity_logs", "is_archived", "TINYINT(1) NOT NULL DEFAULT 0 AFTER user_agent"),
+    ("products", "points_cost", "INT NOT NULL DEFAULT 0 AFTER discount_percent"),
+    ("customers", "email_lower", "VARCHAR(100) NULL AFTER email"),
+    ("customers", "transaction_count", "INT NOT NULL DEFAULT 0 AFTER total_purchases"),
+    ("transactions", "item_count", "INT NOT NULL DEFAULT 0 AFTER notes"),
+    # Loyalty member lifecycle fields (archive + activity)
+    ("loyalty_members", "is_archived", "TINYINT(1) NOT NULL DEFAULT 0 AFTER is_active"),
+    ("loyalty_members", "archived_at", "DATETIME NULL AFTER is_archived"),
+    ("loyalty_members", "deactivated_at", "DATETIME NULL AFTER archived_at"),
+    ("loyalty_members", "activated_at", "DATETIME NULL AFTER deactivated_at"),
+    ("loyalty_members", "last_active_at", "DATETIME NULL AFTER activated_at"),
+    ("loyalty_members", "last_seen_at", "DATETIME NULL DEFAULT CURRENT_TIMESTAMP AFTER last_active_at"),
+    ("loyalty_members", "reactivation_remaining", "INT NOT NULL DEFAULT 3 AFTER last_active_at"),
+]
+
+# One-off statements to run right after the matching column is added.
+_SCHEMA_PATCH_BACKFILLS = {
+    ("users", "display_name"): (
+        "UPDATE users SET display_name = "
+        "COALESCE(NULLIF(TRIM(nickname), ''), LEFT(TRIM(CONCAT(first_name, ' ', last_name)), 100))",
+        "CREATE INDEX ix_users_display_name ON users (display_name)",
+    ),
+    ("customers", "email_lower"): (
+        "UPDATE customers SET email_lower = LOWER(TRIM(email)) WHERE email IS NOT NULL",
+        "CREATE INDEX ix_customers_email_lower ON customers (email_lower)",
+    ),
+    ("loyalty_members", "last_seen_at"): (
+        "UPDATE loyalty_members SET last_seen_at = COALESCE(last_active_at, activated_at, created_at)",
+        "CREATE INDEX ix_loyalty_members_last_seen_at ON loyalty_members (last_seen_at)",
+    ),
+    ("customers", "transaction_count"): (
+        "UPDATE customers c SET transaction_count = "
+        "(SELECT COUNT(*) FROM transactions t WHERE t.customer_id = c.id)",
+    ),
+    ("transactions", "item_count"): (
+        "UPDATE transactions t SET item_count = "
+        "(SELECT COALESCE(SUM(i.quantity), 0) FROM transaction_items i WHERE i.transaction_id = t.id)",
+    ),
+}
+
+# Tables the schema patch may create outright.
+_SCHEMA_PATCH_TABLES = ("promotions", "refund_requests", "revoked_tokens")
+
+# Set once the (optional) startup schema patch has finished.
+READY = threading.Event()
+
+# Default loyalty tiers upserted by the schema patch.
+_DEFAULT_LOYALTY_TIERS = [
+    {
+        "id": 1,
+        "name": "Bronze",
+        "min_points": 1,
+        "max_points": 99,
+        "discount_percent": 5.00,
+        "points_multiplier": 1.00,
+        "color": "#CD7F32",
+        "icon": "stars",
+        "benefits": "5% discount on purchases",
+        "is_active": True,
+    },
+    {
+        "id": 2,
+        "name": "Silver",
+        "min_points": 100,
+        "max_points": 499,
+        "discount_percent": 10.00,
+        "points_multiplier": 1.50,
+        "color": "#C0C0C0",
+        "icon": "star",
+        "benefits": "10% discount on purchases",
+        "is_active": True,
+    },
+    {
+        "id": 3,
+        "name": "Gold",
+        "min_points": 500,
+        "max_points": 999,
+        "discount_percent": 15.00,
+        "points_multiplier": 2.00,
+        "color": "#FFD700",
+        "icon": "workspace_premium",
+        "benefits": "15% discount on purchases",
+        "is_active": True,
+    },
+    {
+        "id": 4,
+        "name": "Platinum",
+        "min_points": 1000,
+        "max_points": None,
+        "discount_percent": 20.00,
+        "points_multiplier": 2.00,
+        "color": "#E5E4E2",
+        "icon": "workspace_premium",
+        "benefits": "20% discount on purchases",
+        "is_active": True,
+    },
+]
+
+# Bump the version suffix to force a re-run of the patch on every database.
+_SCHEMA_PATCH_VERSION = b"|v3"
+_SCHEMA_PATCH_FINGERPRINT = hashlib.sha1(
+    json.dumps(
+        {
+            "columns": _SCHEMA_PATCH_COLUMNS,
+            "tables": _SCHEMA_PATCH_TABLES,
+            "tiers": _DEFAULT_LOYALTY_TIERS,
+        },
+        sort_keys=True,
+    ).encode()
+    + _SCHEMA_PATCH_VERSION
+).hexdigest()
+
+
+def _introspect_schema(conn) -> tuple[set[str], set[tuple[str, str]]]:
+    """Fetch the table/column state the schema patch cares about.
+
+    Two information_schema round-trips total, instead of one per probe.
+    Returns `(existing_tables, existing_columns)` where columns are
+    `(table, column)` pairs.
+    """
+    tables = tuple(sorted(set(_SCHEMA_PATCH_TABLES) | {t for t, _, _ in _SCHEMA_PATCH_COLUMNS}))
+    columns = tuple(sorted({c for _, c, _ in _SCHEMA_PATCH_COLUMNS}))
+
+    existing_tables = {
+        row[0]
+        for row in conn.execute(
+            text(
+                """
+                SELECT TABLE_NAME
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME IN :tables
+                """
+            ).bindparams(bindparam("tables", expanding=True)),
+            {"tables": tables},
+        )
+    }
+    existing_columns = {
+        (row[0], row[1])
+        for row in conn.execute(
+            text(
+                """
+                SELECT TABLE_NAME, COLUMN_NAME
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME IN :tables
+                  AND COLUMN_NAME IN :columns
+                """
+            ).bindparams(
+                bindparam("tables", expanding=True),
+                bindparam("columns", expanding=True),
+            ),
+            {"tables": tables, "columns": columns},
+        )
+    }
+
+    return existing_tables, existing_columns
+
+
+def _upsert_default_loyalty_tiers(conn):
+    """Upsert `_DEFAULT_LOYALTY_TIERS` in a single statement.
+
+    MySQL's ON DUPLICATE KEY fires on either the primary key or the unique
+    `name`, so a tier that was created by hand under a different id is
+    normalized in place rather than duplicated.
+    """
+    from models.loyalty import LoyaltyTier
+
+    table = LoyaltyTier.__table__
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        raise RuntimeError(f"Tier upsert not supported on {dialect}")
+
+    stmt = dialect_insert(table).values(_DEFAULT_LOYALTY_TIERS)
+    upd = {
+        key: (stmt.inserted[key] if dialect == "mysql" else stmt.excluded[key])
+        for key in _DEFAULT_LOYALTY_TIERS[0]
+        if key != "id"
+    }
+    # Upsert clauses don't apply Column.onupdate, so bump it explicitly.
+    upd["updated_at"] = datetime.now()
+
+    if dialect == "mysql":
+        stmt = stmt.on_duplicate_key_update(**upd)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.id], set_=upd)
+    conn.execute(stmt)
+
+
+def _deferred_schema_patch(app):
+    """Run the optional startup schema patch off the request-binding path.
+
+    All probes, DDL and the tier upsert share one Core connection/transaction
+    (MySQL auto-commits each DDL statement anyway). Always sets `READY`, even
+    if the patch fails, so the readiness probe does not stay red forever on a
+    transient DB error.
+    """
+    try:
+        with app.app_context():
+            if db.engine.dialect.name != "mysql":
+                return
+
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(
+                    "CREATE TABLE IF NOT EXISTS app_meta "
+                    "(k VARCHAR(64) PRIMARY KEY, v VARCHAR(64))"
+                )
+                stored_fp = conn.exec_driver_sql(
+                    "SELECT v FROM app_meta WHERE k = 'schema_fp'"
+                ).scalar()
+
+                if stored_fp == _SCHEMA_PATCH_FINGERPRINT:
+                    print("✓ Schema patch already applied; skipping")
+                    return
+
+                patch_ok = True
+                existing_tables, existing_columns = _introspect_schema(conn)
+
+                # Create promotions table if missing (safe, one-off).
+                if 'promotions' not in existing_tables:
+                    from models.promotion import Promotion
+
+                    Promotion.__table__.create(conn)
+
+                # Create refund_requests table if missing (safe, one-off).
+                if 'refund_requests' not in existing_tables:
+                    from models.refund_request import RefundRequest
+
+                    RefundRequest.__table__.create(conn)
+
+                # Create the logout blocklist if missing (safe, one-off).
+                if 'revoked_tokens' not in existing_tables:
+                    from models.user import RevokedToken
+
+                    RevokedToken.__table__.create(conn)
+
+                # Add missing columns: one multi-clause ALTER per table so
+                # MySQL rebuilds each table at most once.
+                missing: dict[str, list[str]] = {}
+                for table, column, ddl in _SCHEMA_PATCH_COLUMNS:
+                    if (table, column) not in existing_columns:
+                        missing.setdefault(table, []).append(
+                            f"ADD COLUMN {column} {ddl}"
+                        )
+
+                for table, frags in missing.items():
+                    try:
+                        conn.exec_driver_sql(f"ALTER TABLE {table} {', '.join(frags)}")
+                    except Exception as e:
+                        patch_ok = False
+                        print(f"⚠️ Schema patch for {table} failed: {e}")
+                        continue
+
+                    for (bf_table, bf_column), statements in _SCHEMA_PATCH_BACKFILLS.items():
+                        if bf_table == table and (bf_table, bf_column) not in existing_columns:
+                            try:
+                                for sql in statements:
+                                    conn.exec_driver_sql(sql)
+                            except Exception as e:
+                                patch_ok = False
+                                print(f"⚠️ Backfill of {bf_table}.{bf_column} failed: {e}")
+
+                # Upsert default loyalty tiers (safe, idempotent).
+                try:
+                    _upsert_default_loyalty_tiers(conn)
+                except Exception as e:
+                    patch_ok = False
+                    print(f"⚠️ Loyalty tier upsert failed: {e}")
+
+                # Only remember the fingerprint once every step succeeded,
+                # so a partial failure is retried on the next boot.
+                if patch_ok:
+                    conn.exec_driver_sql(
+                        "INSERT INTO app_meta (k, v) VALUES ('schema_fp', %s) "
+                        "ON DUPLICATE KEY UPDATE v = VALUES(v)",
+                        (_SCHEMA_PATCH_FINGERPRINT,),
+                    )
+    except Exception as e:
+        print(f"⚠️ Schema patch skipped/failed: {e}")
+    finally:
+        READY.set()
+
+
 def create_app(config_class=None):
     """Application factory pattern"""
     app = Flask(__name__)
     
     # Disable strict slashes to prevent 308 redirects
     app.url_map.strict_slashes = False
+    app.url_map.converters['nonapi'] = NonApiConverter
     
     # Load configuration
     if config_class is None:
@@ -84,22 +405,22 @@ def create_app(config_class=None):
     app.config.from_object(config_class)
     app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = SQLALCHEMY_TRACK_MODIFICATIONS
+
+    # Serialize jsonify() responses with orjson (falls back to stdlib json).
+    install_json_provider(app)
     
     # Initialize extensions
     init_extensions(app)
 
-    # Allow browser-based clients (Flutter web) to call the API.
-    # Note: tighten `origins` for production.
-    CORS(
-        app,
-        resources={r"/api/*": {"origins": "*"}},
-        allow_headers=["Content-Type", "Authorization"],
-        methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-    )
+    # models/ imports lazily; register every mapper before anything queries
+    # (string-based relationships need their targets loaded).
+    load_all_models()
 
     # Optional one-off schema patch.
     # Disabled by default because it forces an immediate DB connection on startup
     # and can contribute to MySQL/MariaDB instability on some XAMPP installs.
+    # Runs in a background thread so the server binds its port immediately;
+    # /api/health/ready reports 503 until it finishes.
     run_schema_patch = os.getenv("RUN_SCHEMA_PATCH_ON_STARTUP", "false").lower() in {
         "1",
         "true",
@@ -107,285 +428,11 @@ def create_app(config_class=None):
         "on",
     }
     if run_schema_patch:
-        try:
-            with app.app_context():
-                if db.engine.dialect.name == "mysql":
-                    # Create promotions table if missing (safe, one-off).
-                    promos_table_exists = db.session.execute(
-                        text(
-                            """
-                            SELECT COUNT(*)
-                            FROM information_schema.TABLES
-                            WHERE TABLE_SCHEMA = DATABASE()
-                              AND TABLE_NAME = 'promotions'
-                            """
-                        )
-                    ).scalar()
-                    if int(promos_table_exists or 0) == 0:
-                        from models.promotion import Promotion
-
-                        Promotion.__table__.create(db.engine)
-
-                    # Create refund_requests table if missing (safe, one-off).
-                    refund_table_exists = db.session.execute(
-                        text(
-                            """
-                            SELECT COUNT(*)
-                            FROM information_schema.TABLES
-                            WHERE TABLE_SCHEMA = DATABASE()
-                              AND TABLE_NAME = 'refund_requests'
-                            """
-                        )
-                    ).scalar()
-                    if int(refund_table_exists or 0) == 0:
-                        from models.refund_request import RefundRequest
-
-                        RefundRequest.__table__.create(db.engine)
-
-                    # Add nickname column if not exists
-                    exists = db.session.execute(
-                        text(
-                            """
-                            SELECT COUNT(*)
-                            FROM information_schema.COLUMNS
-                            WHERE TABLE_SCHEMA = DATABASE()
-                              AND TABLE_NAME = 'users'
-                              AND COLUMN_NAME = 'nickname'
-                            """
-                        )
-                    ).scalar()
-                    if int(exists or 0) == 0:
-                        db.session.execute(
-                            text(
-                                "ALTER TABLE users ADD COLUMN nickname VARCHAR(50) NULL AFTER last_name"
-                            )
-                        )
-                        db.session.commit()
-
-                    # Add address column if not exists
-                    address_exists = db.session.execute(
-                        text(
-                            """
-                            SELECT COUNT(*)
-                            FROM information_schema.COLUMNS
-                            WHERE TABLE_SCHEMA = DATABASE()
-                              AND TABLE_NAME = 'users'
-                              AND COLUMN_NAME = 'address'
-                            """
-                        )
-                    ).scalar()
-                    if int(address_exists or 0) == 0:
-                        db.session.execute(
-                            text(
-                                "ALTER TABLE users ADD COLUMN address VARCHAR(500) NULL AFTER phone"
-                            )
-                        )
-                        db.session.commit()
-
-                    # Add is_archived column to activity_logs if not exists
-                    activity_archived_exists = db.session.execute(
-                        text(
-                            """
-                            SELECT COUNT(*)
-                            FROM information_schema.COLUMNS
-                            WHERE TABLE_SCHEMA = DATABASE()
-                              AND TABLE_NAME = 'activity_logs'
-                              AND COLUMN_NAME = 'is_archived'
-                            """
-                        )
-                    ).scalar()
-                    if int(activity_archived_exists or 0) == 0:
-                        db.session.execute(
-                            text(
-                                "ALTER TABLE activity_logs ADD COLUMN is_archived TINYINT(1) NOT NULL DEFAULT 0 AFTER user_agent"
-                            )
-                        )
-                        db.session.commit()
-
-                    # Add points_cost column to products if not exists
-                    points_cost_exists = db.session.execute(
-                        text(
-                            """
-                            SELECT COUNT(*)
-                            FROM information_schema.COLUMNS
-                            WHERE TABLE_SCHEMA = DATABASE()
-                              AND TABLE_NAME = 'products'
-                              AND COLUMN_NAME = 'points_cost'
-                            """
-                        )
-                    ).scalar()
-                    if int(points_cost_exists or 0) == 0:
-                        db.session.execute(
-                            text(
-                                "ALTER TABLE products ADD COLUMN points_cost INT NOT NULL DEFAULT 0 AFTER discount_percent"
-                            )
-                        )
-                        db.session.commit()
-
-                    # Loyalty member lifecycle fields (archive + activity)
-                    try:
-                        def _col_exists(col: str) -> int:
-                            return int(
-                                (
-                                    db.session.execute(
-                                        text(
-                                            """
-                                            SELECT COUNT(*)
-                                            FROM information_schema.COLUMNS
-                                            WHERE TABLE_SCHEMA = DATABASE()
-                                              AND TABLE_NAME = 'loyalty_members'
-                                              AND COLUMN_NAME = :col
-                                            """
-                                        ),
-                                        {'col': col},
-                                    ).scalar()
-                                )
-                                or 0
-                            )
-
-                        if _col_exists('is_archived') == 0:
-                            db.session.execute(
-                                text(
-                                    "ALTER TABLE loyalty_members ADD COLUMN is_archived TINYINT(1) NOT NULL DEFAULT 0 AFTER is_active"
-                                )
-                            )
-                            db.session.commit()
-
-                        if _col_exists('archived_at') == 0:
-                            db.session.execute(
-                                text(
-                                    "ALTER TABLE loyalty_members ADD COLUMN archived_at DATETIME NULL AFTER is_archived"
-                                )
-                            )
-                            db.session.commit()
-
-                        if _col_exists('deactivated_at') == 0:
-                            db.session.execute(
-                                text(
-                                    "ALTER TABLE loyalty_members ADD COLUMN deactivated_at DATETIME NULL AFTER archived_at"
-                                )
-                            )
-                            db.session.commit()
-
-                        if _col_exists('activated_at') == 0:
-                            db.session.execute(
-                                text(
-                                    "ALTER TABLE loyalty_members ADD COLUMN activated_at DATETIME NULL AFTER deactivated_at"
-                                )
-                            )
-                            db.session.commit()
-
-                        if _col_exists('last_active_at') == 0:
-                            db.session.execute(
-                                text(
-                                    "ALTER TABLE loyalty_members ADD COLUMN last_active_at DATETIME NULL AFTER activated_at"
-                                )
-                            )
-                            db.session.commit()
-
-                        if _col_exists('reactivation_remaining') == 0:
-                            db.session.execute(
-                                text(
-                                    "ALTER TABLE loyalty_members ADD COLUMN reactivation_remaining INT NOT NULL DEFAULT 3 AFTER last_active_at"
-                                )
-                            )
-                            db.session.commit()
-                    except Exception as e:
-                        try:
-                            db.session.rollback()
-                        except Exception:
-                            pass
-                        print(f"⚠️ Loyalty member schema patch failed: {e}")
-
-                    # Upsert default loyalty tiers (safe, idempotent).
-                    try:
-                        from models.loyalty import LoyaltyTier
-                        from sqlalchemy import func
-
-                        desired = [
-                            {
-                                "id": 1,
-                                "name": "Bronze",
-                                "min_points": 1,
-                                "max_points": 99,
-                                "discount_percent": 5.00,
-                                "points_multiplier": 1.00,
-                                "color": "#CD7F32",
-                                "icon": "stars",
-                                "benefits": "5% discount on purchases",
-                                "is_active": True,
-                            },
-                            {
-                                "id": 2,
-                                "name": "Silver",
-                                "min_points": 100,
-                                "max_points": 499,
-                                "discount_percent": 10.00,
-                                "points_multiplier": 1.50,
-                                "color": "#C0C0C0",
-                                "icon": "star",
-                                "benefits": "10% discount on purchases",
-                                "is_active": True,
-                            },
-                            {
-                                "id": 3,
-                                "name": "Gold",
-                                "min_points": 500,
-                                "max_points": 999,
-                                "discount_percent": 15.00,
-                                "points_multiplier": 2.00,
-                                "color": "#FFD700",
-                                "icon": "workspace_premium",
-                                "benefits": "15% discount on purchases",
-                                "is_active": True,
-                            },
-                            {
-                                "id": 4,
-                                "name": "Platinum",
-                                "min_points": 1000,
-                                "max_points": None,
-                                "discount_percent": 20.00,
-                                "points_multiplier": 2.00,
-                                "color": "#E5E4E2",
-                                "icon": "workspace_premium",
-                                "benefits": "20% discount on purchases",
-                                "is_active": True,
-                            },
-                        ]
-
-                        for d in desired:
-                            tier = LoyaltyTier.query.filter_by(id=d["id"]).first()
-                            if not tier:
-                                tier = LoyaltyTier.query.filter(
-                                    func.lower(LoyaltyTier.name)
-                                    == d["name"].lower()
-                                ).first()
-                            if not tier:
-                                tier = LoyaltyTier(name=d["name"])
-                                db.session.add(tier)
-
-                            # Normalize stored name.
-                            tier.name = d["name"]
-
-                            tier.min_points = d["min_points"]
-                            tier.max_points = d["max_points"]
-                            tier.discount_percent = d["discount_percent"]
-                            tier.points_multiplier = d["points_multiplier"]
-                            tier.color = d["color"]
-                            tier.icon = d["icon"]
-                            tier.benefits = d["benefits"]
-                            tier.is_active = d["is_active"]
-
-                        db.session.commit()
-                    except Exception as e:
-                        db.session.rollback()
-                        print(f"⚠️ Loyalty tier upsert failed: {e}")
-        except Exception as e:
-            try:
-                db.session.rollback()
-            except Exception:
-                pass
-            print(f"⚠️ Schema patch skipped/failed: {e}")
+        threading.Thread(
+            target=_deferred_schema_patch, args=(app,), daemon=True
+        ).start()
+    else:
+        READY.set()
     
     # Register blueprints
     register_blueprints(app)
@@ -394,35 +441,42 @@ def create_app(config_class=None):
     # Optional: Serve Flutter Web build from this Flask server.
     # This makes the app reachable at: http://<LAN-IP>:5000/
     # ------------------------------------------------------------
-    flutter_web_dir = _resolve_flutter_web_build_dir()
     serve_web = os.getenv("SERVE_FLUTTER_WEB", "true").lower() in {
         "1",
         "true",
         "yes",
         "on",
     }
-    flutter_index = flutter_web_dir / "index.html"
-    web_enabled = serve_web and flutter_index.exists()
+    # Only touch the filesystem when web hosting is actually requested.
+    web_enabled = False
+    if serve_web:
+        flutter_web_dir = _resolve_flutter_web_build_dir()
+        app.config["FLUTTER_WEB_BUILD_DIR"] = str(flutter_web_dir)
+        web_enabled = (flutter_web_dir / "index.html").exists()
 
-    app.config["FLUTTER_WEB_BUILD_DIR"] = str(flutter_web_dir)
-    app.config["FLUTTER_WEB_ENABLED"] = bool(web_enabled)
+    app.config["FLUTTER_WEB_ENABLED"] = web_enabled
 
     if web_enabled:
 
+        # `nonapi` never matches api/..., so API misses go straight to the
+        # JSON 404 handler without entering this view.
         @app.route("/", defaults={"path": ""})
-        @app.route("/<path:path>")
+        @app.route("/<nonapi:path>")
         def flutter_web(path: str):
-            # Never intercept API routes.
-            if path.startswith("api"):
-                abort(404)
-
-            # Serve exact asset files if they exist.
-            file_path = flutter_web_dir / path
-            if path and file_path.exists() and file_path.is_file():
-                return send_from_directory(flutter_web_dir, path)
+            # Serve exact asset files if they exist; send_from_directory does
+            # its own stat, so don't pre-check.
+            if path:
+                try:
+                    resp = send_from_directory(flutter_web_dir, path)
+                    resp.headers["Cache-Control"] = _flutter_cache_control(path)
+                    return resp
+                except NotFound:
+                    pass
 
             # Otherwise serve the SPA entrypoint.
-            return send_from_directory(flutter_web_dir, "index.html")
+            resp = send_from_directory(flutter_web_dir, "index.html")
+            resp.headers["Cache-Control"] = _FLUTTER_NO_CACHE
+            return resp
 
     else:
 
@@ -445,6 +499,16 @@ def create_app(config_class=None):
             'message': 'Vivian Cosmetic Shop API is running',
             'version': '1.0.0'
         }), 200
+
+    @app.route('/api/health/live', methods=['GET'])
+    def health_live():
+        return jsonify({'success': True, 'status': 'live'}), 200
+
+    @app.route('/api/health/ready', methods=['GET'])
+    def health_ready():
+        if not READY.is_set():
+            return jsonify({'success': False, 'status': 'starting'}), 503
+        return jsonify({'success': True, 'status': 'ready'}), 200
     
     # Root endpoint (API info). If Flutter web hosting is enabled, this moves to /api.
     @app.route('/api', methods=['GET'])
@@ -476,7 +540,9 @@ def create_app(config_class=None):
             flutter_web_dir_local = Path(app.config["FLUTTER_WEB_BUILD_DIR"])
             index_file = flutter_web_dir_local / "index.html"
             if index_file.exists():
-                return send_from_directory(flutter_web_dir_local, "index.html")
+                resp = send_from_directory(flutter_web_dir_local, "index.html")
+                resp.headers["Cache-Control"] = _FLUTTER_NO_CACHE
+                return resp
 
         return jsonify({'success': False, 'message': 'Resource not found'}), 404
 
@@ -516,7 +582,8 @@ if __name__ == '__main__':
     debug = os.getenv('DEBUG', 'False').lower() == 'true'
 
     web_enabled = bool(app.config.get("FLUTTER_WEB_ENABLED"))
-    lan_ip = _get_lan_ip()
+    # LAN discovery is only useful for local debugging; skip the probe otherwise.
+    lan_ip = _get_lan_ip() if debug else None
     lan_base = f"http://{lan_ip}:{port}" if lan_ip else None
     local_base = f"http://localhost:{port}"
     
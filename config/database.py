@@ -10,11 +10,26 @@ Notes for Render Postgres:
   (for services running on Render private network) into DATABASE_URL.
 - Render URLs may be `postgres://...`; SQLAlchemy expects `postgresql://...`.
 """
+import importlib.util
 import os
-from dotenv import load_dotenv
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-_is_production = os.getenv('FLASK_ENV', 'development') == 'production'
-load_dotenv(override=(not _is_production))
+from config.env import ensure_loaded
+
+ensure_loaded()
+
+
+# libpq TCP keepalives so idle pooled connections aren't silently dropped by
+# NATs/load balancers between requests.
+_PG_KEEPALIVE_PARAMS = {'keepalives': '1', 'keepalives_idle': '30'}
+
+
+def _with_pg_keepalives(url: str) -> str:
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    for key, value in _PG_KEEPALIVE_PARAMS.items():
+        query.setdefault(key, value)
+    return urlunsplit(parts._replace(query=urlencode(query)))
 
 
 def _normalize_database_url(url: str) -> str:
@@ -22,13 +37,30 @@ def _normalize_database_url(url: str) -> str:
     # Heroku/Render-style scheme alias + make driver explicit.
     # We prefer psycopg (v3) for better Windows/Python 3.13 wheel support.
     if url.startswith('postgres://'):
-        return 'postgresql+psycopg://' + url[len('postgres://'):]
-    if url.startswith('postgresql://'):
-        return 'postgresql+psycopg://' + url[len('postgresql://'):]
+        url = 'postgresql+psycopg://' + url[len('postgres://'):]
+    elif url.startswith('postgresql://'):
+        url = 'postgresql+psycopg://' + url[len('postgresql://'):]
+
+    if url.startswith('postgresql'):
+        return _with_pg_keepalives(url)
 
     return url
 
 
+def _mysql_driver() -> str:
+    """Pick the MySQL DBAPI driver.
+
+    Prefer mysqlclient (C, `MySQLdb`) for faster result decoding; fall back to
+    pure-Python PyMySQL when it isn't installed. DB_DRIVER can force either.
+    """
+    forced = os.getenv('DB_DRIVER', '').strip().lower()
+    if forced in {'mysqldb', 'pymysql'}:
+        return forced
+    if importlib.util.find_spec('MySQLdb') is not None:
+        return 'mysqldb'
+    return 'pymysql'
+
+
 def _build_mysql_uri() -> str:
     # MySQL Database Configuration (XAMPP)
     database_config = {
@@ -41,7 +73,7 @@ def _build_mysql_uri() -> str:
     }
 
     return (
-        f"mysql+pymysql://{database_config['user']}:{database_config['password']}"
+        f"mysql+{_mysql_driver()}://{database_config['user']}:{database_config['password']}"
         f"@{database_config['host']}:{database_config['port']}/{database_config['database']}"
         f"?charset={database_config['charset']}"
     )
@@ -0,0 +1,26 @@
+"""backend.config.env
+
+Load `backend/.env` exactly once per process, regardless of the current
+working directory.
+
+IMPORTANT for production (e.g., Render): do NOT override real environment
+variables injected by the host.
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+_DOTENV_PATH = Path(__file__).resolve().parent.parent / '.env'
+_loaded = False
+
+
+def ensure_loaded() -> None:
+    """Load the backend .env file on first call; later calls are no-ops."""
+    global _loaded
+    if _loaded:
+        return
+    is_production = os.getenv('FLASK_ENV', 'development') == 'production'
+    if _DOTENV_PATH.exists():
+        load_dotenv(dotenv_path=_DOTENV_PATH, override=(not is_production))
+    _loaded = True
@@ -1,12 +1,15 @@
 """
 Application settings and configuration
 """
+import functools
 import os
 from datetime import timedelta
-from dotenv import load_dotenv
+from config.env import ensure_loaded
 
-_is_production = os.getenv('FLASK_ENV', 'development') == 'production'
-load_dotenv(override=(not _is_production))
+ensure_loaded()
+
+# Read once after .env is loaded; the environment doesn't change at runtime.
+FLASK_ENV = os.getenv('FLASK_ENV', 'development')
 
 
 class Config:
@@ -16,8 +19,33 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)  # 8 hour shift
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
-    # CORS Settings
-    CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')
+    # SQLAlchemy connection pool. pre_ping avoids handing out connections the
+    # server already closed; recycle stays below MySQL's default wait_timeout.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'pool_timeout': 10,
+        # Compiled-statement cache per engine (SQLAlchemy default is 500)
+        'query_cache_size': 1200,
+    }
+    
+    # werkzeug hash method for new passwords and PINs, e.g. "scrypt" or
+    # "pbkdf2:sha256:600000". Hashes made with another method are upgraded
+    # on the user's next successful login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    # Max password/PIN hashes computed at once per worker process
+    # (default: CPU count). Further logins queue instead of oversubscribing.
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY') or 0) or None
+    
+    # Let the front web server (Apache mod_xsendfile, lighttpd) stream static
+    # files via X-Sendfile instead of piping bytes through Python. Leave off
+    # unless that server is configured for it, or responses will be empty.
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'false').lower() in {'1', 'true', 'yes', 'on'}
+    
+    # CORS Settings (comma-separated list, or * for any origin)
+    CORS_ORIGINS = [o.strip() for o in os.getenv('CORS_ORIGINS', '*').split(',') if o.strip()] or ['*']
     
     # Application Settings
     APP_NAME = 'Vivian Cosmetic Shop API'
@@ -53,7 +81,7 @@ config = {
 }
 
 
+@functools.lru_cache(maxsize=1)
 def get_config():
     """Get configuration based on environment"""
-    env = os.getenv('FLASK_ENV', 'development')
-    return config.get(env, config['default'])
+    return config.get(FLASK_ENV, config['default'])
@@ -8,53 +8,55 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import inspect, select
+
 from app import app, db
+from utils.bulk_insert import insert_missing
+from utils.script_logging import get_script_logger
 from models import Setting
-from models.user import User
+from models.user import User, compose_display_name, hash_secret
 from models.product import Product, Category
 
+log = get_script_logger(__name__)
+
 
 def seed_users():
     """Create default users"""
-    print("Creating default users...")
+    log.info("Creating default users...")
     
-    # Check if admin exists
-    if not User.query.filter_by(username='admin').first():
-        admin = User(
-            username='admin',
-            first_name='Admin',
-            last_name='User',
-            password='admin123',
-            role='supervisor',
-            email='admin@viviancosmetics.com'
-        )
-        admin.set_pin('1234')
-        db.session.add(admin)
-        print("  ✓ Admin user created")
-    else:
-        print("  - Admin user already exists")
+    users = [
+        # (username, first, last, password, role, email, pin)
+        ('admin', 'Admin', 'User', 'admin123', 'supervisor', 'admin@viviancosmetics.com', '1234'),
+        ('cashier1', 'Maria', 'Santos', 'cashier123', 'cashier', 'cashier1@viviancosmetics.com', None),
+    ]
     
-    # Check if cashier exists
-    if not User.query.filter_by(username='cashier1').first():
-        cashier = User(
-            username='cashier1',
-            first_name='Maria',
-            last_name='Santos',
-            password='cashier123',
-            role='cashier',
-            email='cashier1@viviancosmetics.com'
-        )
-        db.session.add(cashier)
-        print("  ✓ Cashier user created")
-    else:
-        print("  - Cashier user already exists")
+    # Hashing is deliberately slow (scrypt), so skip users that already
+    # exist; re-runs (e.g. the deploy release command) then hash nothing.
+    wanted = [u[0] for u in users]
+    existing = set(db.session.scalars(select(User.username).where(User.username.in_(wanted))))
+    
+    rows = [
+        {
+            'username': username,
+            'first_name': first,
+            'last_name': last,
+            'display_name': compose_display_name(first, last),
+            'password_hash': hash_secret(password),
+            'pin_hash': hash_secret(pin) if pin else None,
+            'role': role,
+            'email': email,
+        }
+        for username, first, last, password, role, email, pin in users
+        if username not in existing
+    ]
     
-    db.session.commit()
+    created = insert_missing(User, rows, 'username')
+    log.info(f"  ✓ {created} user(s) created, {len(users) - created} already existed")
 
 
 def seed_categories():
     """Create default categories"""
-    print("Creating default categories...")
+    log.info("Creating default categories...")
     
     categories = [
         ('Lipstick', 'Lipsticks and lip products', 'lips', '#E91E63'),
@@ -67,23 +69,18 @@ def seed_categories():
         ('Tools', 'Makeup brushes and tools', 'brush', '#607D8B'),
     ]
     
-    for name, desc, icon, color in categories:
-        if not Category.query.filter_by(name=name).first():
-            category = Category(name=name, description=desc, icon=icon, color=color)
-            db.session.add(category)
-            print(f"  ✓ Category '{name}' created")
-        else:
-            print(f"  - Category '{name}' already exists")
+    rows = [
+        {'name': name, 'description': desc, 'icon': icon, 'color': color}
+        for name, desc, icon, color in categories
+    ]
     
-    db.session.commit()
+    created = insert_missing(Category, rows, 'name')
+    log.info(f"  ✓ {created} category(ies) created, {len(rows) - created} already existed")
 
 
 def seed_products():
     """Create sample products"""
-    print("Creating sample products...")
-    
-    # Commit categories first to ensure they are saved
-    db.session.commit()
+    log.info("Creating sample products...")
     
     products = [
         ('LIP-001', '8901234567890', 'Velvet Matte Lipstick - Rose', 150.00, 350.00, 50, 1),
@@ -100,54 +97,58 @@ def seed_products():
         ('TLS-001', '8901234567901', 'Professional Brush Set', 400.00, 899.00, 12, 8),
     ]
     
-    # Disable autoflush to prevent premature flushing
-    with db.session.no_autoflush:
-        for sku, barcode, name, cost, price, stock, cat_id in products:
-            if not Product.query.filter_by(sku=sku).first():
-                product = Product(
-                    sku=sku,
-                    barcode=barcode,
-                    name=name,
-                    cost_price=cost,
-                    selling_price=price,
-                    stock_quantity=stock,
-                    category_id=cat_id,
-                    low_stock_threshold=10
-                )
-                db.session.add(product)
-                print(f"  ✓ Product '{name}' created")
-            else:
-                print(f"  - Product '{name}' already exists")
+    rows = [
+        {
+            'sku': sku,
+            'barcode': barcode,
+            'name': name,
+            'cost_price': cost,
+            'selling_price': price,
+            'stock_quantity': stock,
+            'category_id': cat_id,
+            'low_stock_threshold': 10,
+        }
+        for sku, barcode, name, cost, price, stock, cat_id in products
+    ]
     
-    db.session.commit()
+    created = insert_missing(Product, rows, 'sku')
+    log.info(f"  ✓ {created} product(s) created, {len(rows) - created} already existed")
 
 
 def init_db():
     """Initialize database with default data"""
     with app.app_context():
-        print("\n" + "="*50)
-        print("Vivian Cosmetic Shop - Database Initialization")
-        print("="*50 + "\n")
+        log.info("\n" + "="*50)
+        log.info("Vivian Cosmetic Shop - Database Initialization")
+        log.info("="*50 + "\n")
         
-        # Create tables
-        print("Creating database tables...")
-        db.create_all()
-        print("  ✓ Tables created\n")
+        # Create tables (one catalog query first; create_all would probe
+        # every table individually even when the schema is already there)
+        log.info("Creating database tables...")
+        existing = set(inspect(db.engine).get_table_names())
+        missing = set(db.metadata.tables) - existing
+        if missing:
+            db.create_all()
+            log.info(f"  ✓ Tables created ({len(missing)} new)\n")
+        else:
+            log.info("  - All tables already exist\n")
         
-        # Seed data
-        seed_users()
-        print()
-        seed_categories()
-        print()
-        seed_products()
+        # Seed data in one transaction: a single commit, and a failure
+        # part-way leaves nothing half-seeded.
+        with db.session.begin():
+            seed_users()
+            log.info("")
+            seed_categories()
+            log.info("")
+            seed_products()
         
-        print("\n" + "="*50)
-        print("Database initialization complete!")
-        print("="*50)
-        print("\nDefault login credentials:")
-        print("  Supervisor: admin / admin123 (PIN: 1234)")
-        print("  Cashier: cashier1 / cashier123")
-        print()
+        log.info("\n" + "="*50)
+        log.info("Database initialization complete!")
+        log.info("="*50)
+        log.info("\nDefault login credentials:")
+        log.info("  Supervisor: admin / admin123 (PIN: 1234)")
+        log.info("  Cashier: cashier1 / cashier123")
+        log.info("")
 
 
 if __name__ == '__main__':
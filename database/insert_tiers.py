@@ -6,29 +6,35 @@ import os
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import delete
+
 from app import app, db
 from models.loyalty import LoyaltyTier
-from datetime import datetime
+from utils.bulk_insert import insert_missing
+from utils.script_logging import flush_script_logger, get_script_logger
+
+log = get_script_logger(__name__)
 
 with app.app_context():
     # Check if tiers already exist
     existing_tiers = LoyaltyTier.query.count()
     
     if existing_tiers > 0:
-        print(f"⚠️ {existing_tiers} tiers already exist in database.")
+        log.warning(f"⚠️ {existing_tiers} tiers already exist in database.")
+        flush_script_logger(log)
         response = input("Delete existing tiers and recreate? (yes/no): ")
         if response.lower() != 'yes':
-            print("Cancelled.")
+            log.info("Cancelled.")
             exit()
         
         # Delete existing tiers
-        LoyaltyTier.query.delete()
+        db.session.execute(delete(LoyaltyTier))
         db.session.commit()
-        print("✅ Deleted existing tiers")
+        log.info("✅ Deleted existing tiers")
     
-    # Create default tiers
+    # Create default tiers (plain rows for a single executemany INSERT)
     tiers = [
-        LoyaltyTier(
+        dict(
             id=1,
             name='Bronze',
             min_points=1,
@@ -40,7 +46,7 @@ with app.app_context():
             benefits='5% discount on purchases',
             is_active=True
         ),
-        LoyaltyTier(
+        dict(
             id=2,
             name='Silver',
             min_points=100,
@@ -52,7 +58,7 @@ with app.app_context():
             benefits='10% discount on purchases',
             is_active=True
         ),
-        LoyaltyTier(
+        dict(
             id=3,
             name='Gold',
             min_points=500,
@@ -64,7 +70,7 @@ with app.app_context():
             benefits='15% discount on purchases',
             is_active=True
         ),
-        LoyaltyTier(
+        dict(
             id=4,
             name='Platinum',
             min_points=1000,
@@ -78,12 +84,10 @@ with app.app_context():
         )
     ]
     
-    for tier in tiers:
-        db.session.add(tier)
-    
+    insert_missing(LoyaltyTier, tiers, 'id')
     db.session.commit()
     
-    print("\n✅ Successfully inserted loyalty tiers!")
-    print("\nTiers in database:")
+    log.info("\n✅ Successfully inserted loyalty tiers!")
+    log.info("\nTiers in database:")
     for tier in LoyaltyTier.query.all():
-        print(f"  - {tier.name}: {tier.min_points}-{tier.max_points or '∞'} points, {tier.discount_percent}% discount")
+        log.info(f"  - {tier.name}: {tier.min_points}-{tier.max_points or '∞'} points, {tier.discount_percent}% discount")
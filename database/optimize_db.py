@@ -4,145 +4,198 @@ Adds indexes for improved query performance
 """
 from extensions import db
 
-def add_indexes():
-    """Add database indexes for performance optimization"""
-    
+# (table, index name, column list)
+INDEXES = [
     # Products table indexes
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category_id);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_products_is_active ON products(is_active);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_products_stock ON products(stock_quantity);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
-    """)
-    
-    # Transactions table indexes
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_transactions_cashier_id ON transactions(cashier_id);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_transactions_customer_id ON transactions(customer_id);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions(created_at);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions(status);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_transactions_payment_method ON transactions(payment_method);
-    """)
-    
+    ('products', 'idx_products_barcode', 'barcode'),
+    # Category listings filter on category and active flag together
+    ('products', 'idx_products_category_active', 'category_id, is_active'),
+    ('products', 'idx_products_is_active', 'is_active'),
+    ('products', 'idx_products_stock', 'stock_quantity'),
+    ('products', 'idx_products_name', 'name'),
+    ('products', 'idx_products_active_stock', 'is_active, stock_quantity'),
+    # Transactions table indexes. Per-cashier, per-customer and per-status
+    # listings all filter on one column and sort/range on created_at, so a
+    # composite index serves them with a single range scan.
+    ('transactions', 'idx_tx_cashier_created', 'user_id, created_at DESC'),
+    ('transactions', 'idx_tx_customer_created', 'customer_id, created_at DESC'),
+    ('transactions', 'idx_tx_status_created', 'status, created_at DESC'),
+    ('transactions', 'idx_transactions_created_at', 'created_at'),
+    ('transactions', 'idx_transactions_payment_method', 'payment_method'),
     # Transaction items table indexes
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_transaction_items_transaction_id ON transaction_items(transaction_id);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_transaction_items_product_id ON transaction_items(product_id);
-    """)
-    
+    ('transaction_items', 'idx_transaction_items_transaction_id', 'transaction_id'),
+    ('transaction_items', 'idx_transaction_items_product_id', 'product_id'),
     # Customers table indexes
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_customers_phone ON customers(phone);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_customers_email ON customers(email);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_customers_loyalty_points ON customers(loyalty_points);
-    """)
-    
+    ('customers', 'idx_customers_phone', 'phone'),
+    ('customers', 'idx_customers_email', 'email'),
+    ('customers', 'idx_customers_loyalty_points', 'loyalty_points'),
+    # Loyalty members: tier filter on the member list, with the
+    # active/archived flags every listing also applies
+    ('loyalty_members', 'idx_loyalty_members_tier_status', 'tier_id, is_active, is_archived'),
+    # Refund requests: status queue ordered by request time
+    ('refund_requests', 'idx_refund_requests_status_created', 'status, created_at'),
     # Users table indexes
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_users_is_active ON users(is_active);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
-    """)
-    
+    ('users', 'idx_users_is_active', 'is_active'),
+    ('users', 'idx_users_role', 'role'),
     # Activity logs table indexes (if exists)
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_activity_logs_user_id ON activity_logs(user_id);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_activity_logs_action ON activity_logs(action);
-    """)
-    
-    db.session.execute("""
-        CREATE INDEX IF NOT EXISTS idx_activity_logs_created_at ON activity_logs(created_at);
-    """)
-    
-    db.session.commit()
+    ('activity_logs', 'idx_activity_logs_user_id', 'user_id'),
+    ('activity_logs', 'idx_activity_logs_action', 'action'),
+    # Log listing filters on the archive flag and pages by (created_at, id)
+    ('activity_logs', 'idx_activity_logs_archived_created_id', 'is_archived, created_at DESC, id DESC'),
+]
+
+# Partial-index predicates (SQLite/Postgres); MySQL gets the plain index.
+# A query can only use the index when its WHERE implies the predicate, so
+# each one is written the way SQLAlchemy compiles the query's filter on that
+# dialect: SQLite has no boolean type (`is_active = 1`), while Postgres folds
+# `is_active = true` into plain `is_active`.
+PARTIAL_INDEXES = {
+    # low-stock dashboard: filter_by(is_active=True)
+    'idx_products_active_stock': {'sqlite': 'is_active = 1', 'postgresql': 'is_active'},
+}
+
+# Partial indexes on SQLite/Postgres only: on MySQL the plain index the model
+# already declares serves the same query. Predicates per dialect, as above.
+PARTIAL_ONLY_INDEXES = [
+    # Inactivity sweep in loyalty_member_maintenance.py: only members it can
+    # still archive
+    ('loyalty_members', 'idx_loyalty_last_seen', 'last_seen_at', {
+        'sqlite': 'is_active = 1 AND is_archived = 0',
+        'postgresql': 'is_active AND NOT is_archived',
+    }),
+]
+
+# Postgres-only expression indexes. The customer search index must match
+# routes/customers.py _SEARCH_TEXT exactly for the planner to use it.
+POSTGRES_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_customers_search_trgm ON customers USING gin "
+    "((name || ' ' || coalesce(phone, '') || ' ' || coalesce(email, '')) gin_trgm_ops)",
+]
+
+# Single-column indexes replaced by the composites above. Dropped rather than
+# kept alongside them so every insert doesn't maintain redundant indexes.
+OBSOLETE_INDEXES = [
+    ('transactions', 'idx_transactions_cashier_id'),
+    ('transactions', 'idx_transactions_customer_id'),
+    ('transactions', 'idx_transactions_status'),
+    ('products', 'idx_products_category_id'),
+    ('activity_logs', 'idx_activity_logs_created_at'),
+    ('activity_logs', 'idx_activity_logs_archived_created'),
+    # Duplicate of the unique ix_users_username the model already creates
+    ('users', 'idx_users_username'),
+]
+
+TABLES = [
+    'products', 'categories', 'transactions', 'transaction_items',
+    'customers', 'users', 'activity_logs', 'loyalty_members', 'refund_requests'
+]
+
+
+def add_indexes():
+    """Add database indexes for performance optimization"""
+    dialect = db.engine.dialect.name
+
+    if dialect == 'mysql':
+        # PyMySQL doesn't allow multi-statement strings by default, so batch
+        # per table instead: one ALTER TABLE adds all of that table's indexes
+        # in a single statement (and a single table rebuild).
+        by_table = {}
+        for table, name, columns in INDEXES:
+            by_table.setdefault(table, []).append(f"ADD INDEX IF NOT EXISTS {name} ({columns})")
+        for table, name in OBSOLETE_INDEXES:
+            by_table.setdefault(table, []).append(f"DROP INDEX IF EXISTS {name}")
+
+        with db.engine.connect() as conn:
+            for table, clauses in by_table.items():
+                try:
+                    conn.exec_driver_sql(f"ALTER TABLE {table} {', '.join(clauses)}")
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"⚠️ Could not add indexes on {table}: {e}")
+    else:
+        statements = []
+        for table, name, columns in INDEXES:
+            where = PARTIAL_INDEXES.get(name, {}).get(dialect)
+            if where and dialect == 'sqlite':
+                # Earlier runs created it with a predicate SQLite never
+                # matched; IF NOT EXISTS alone would keep that one.
+                statements.append(f"DROP INDEX IF EXISTS {name};")
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})"
+                + (f" WHERE {where}" if where else "")
+                + ";"
+            )
+        for table, name, columns, predicates in PARTIAL_ONLY_INDEXES:
+            where = predicates.get(dialect)
+            if not where:
+                continue
+            if dialect == 'sqlite':
+                statements.append(f"DROP INDEX IF EXISTS {name};")
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns}) WHERE {where};"
+            )
+        statements += [f"DROP INDEX IF EXISTS {name};" for _, name in OBSOLETE_INDEXES]
+        script = "\n".join(statements)
+        with db.engine.begin() as conn:
+            if dialect == 'sqlite':
+                # executescript() autocommits each statement unless the
+                # script opens its own transaction; WAL is already on via
+                # the connect-time PRAGMAs in extensions.py.
+                conn.connection.executescript(f"BEGIN;\n{script}\nCOMMIT;")
+            else:
+                # Postgres runs transactional DDL: all or nothing.
+                conn.exec_driver_sql(script)
+
+        if dialect == 'postgresql':
+            # Separate transaction: creating pg_trgm needs a privilege the
+            # app role may lack, and that shouldn't undo the indexes above.
+            try:
+                with db.engine.begin() as conn:
+                    for sql in POSTGRES_INDEXES:
+                        conn.exec_driver_sql(sql)
+            except Exception as e:
+                print(f"⚠️ Could not add trigram search index: {e}")
+
     print("✅ Database indexes created successfully!")
 
 def analyze_tables():
     """Analyze tables for optimization"""
-    tables = [
-        'products', 'categories', 'transactions', 'transaction_items',
-        'customers', 'users', 'activity_logs'
-    ]
-    
-    for table in tables:
-        try:
-            db.session.execute(f"ANALYZE TABLE {table};")
-            print(f"✅ Analyzed table: {table}")
-        except Exception as e:
-            print(f"⚠️ Could not analyze {table}: {e}")
-    
-    db.session.commit()
+    dialect = db.engine.dialect.name
+    sql = f"ANALYZE TABLE {', '.join(TABLES)}" if dialect == 'mysql' else "ANALYZE"
+
+    try:
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(sql)
+        print(f"✅ Analyzed tables: {', '.join(TABLES)}")
+    except Exception as e:
+        print(f"⚠️ Could not analyze tables: {e}")
 
 def optimize_tables():
     """Optimize tables for better performance"""
-    tables = [
-        'products', 'categories', 'transactions', 'transaction_items',
-        'customers', 'users', 'activity_logs'
-    ]
-    
-    for table in tables:
-        try:
-            db.session.execute(f"OPTIMIZE TABLE {table};")
-            print(f"✅ Optimized table: {table}")
-        except Exception as e:
-            print(f"⚠️ Could not optimize {table}: {e}")
-    
-    db.session.commit()
+    if db.engine.dialect.name != 'mysql':
+        print("⚠️ OPTIMIZE TABLE is MySQL-only; skipping")
+        return
+
+    try:
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql(f"OPTIMIZE TABLE {', '.join(TABLES)}")
+        print(f"✅ Optimized tables: {', '.join(TABLES)}")
+    except Exception as e:
+        print(f"⚠️ Could not optimize tables: {e}")
 
 if __name__ == "__main__":
     from app import app
-    
+
     with app.app_context():
         print("🔧 Adding database indexes...")
         add_indexes()
-        
+
         print("\n📊 Analyzing tables...")
         analyze_tables()
-        
+
         print("\n⚡ Optimizing tables...")
         optimize_tables()
-        
+
         print("\n✨ Database optimization complete!")
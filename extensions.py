@@ -6,6 +6,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_migrate import Migrate
+from sqlalchemy import event, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -13,12 +16,73 @@ jwt = JWTManager()
 cors = CORS()
 migrate = Migrate()
 
+# Applied to every new SQLite connection (local/dev and test databases).
+# WAL + synchronous=NORMAL avoids an fsync per commit; the larger page cache
+# and mmap keep hot pages out of read() syscalls.
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+# Queue-pool sizing from Config.SQLALCHEMY_ENGINE_OPTIONS that StaticPool
+# doesn't accept.
+_QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def _engine_options(app):
+    """Engine options for the app's database.
+
+    Config.SQLALCHEMY_ENGINE_OPTIONS is the only source of pool settings;
+    this just adapts them for in-memory SQLite.
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+    url = make_url(app.config.get('SQLALCHEMY_DATABASE_URI') or 'sqlite://')
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # In-memory SQLite lives in a single connection: share it via
+        # StaticPool, which doesn't accept queue sizing arguments.
+        for key in _QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+        options.setdefault('poolclass', StaticPool)
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
 
 def init_extensions(app):
     """Initialize all Flask extensions"""
+    # No per-change signals or per-query recording unless a config opts in.
+    app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    app.config.setdefault('SQLALCHEMY_RECORD_QUERIES', False)
+    app.config.setdefault('SQLALCHEMY_ECHO', False)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options(app)
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _set_sqlite_pragmas)
     jwt.init_app(app)
-    cors.init_app(app, resources={r"/api/*": {"origins": "*"}})
+    # Allow browser-based clients (Flutter web) to call the API.
+    # With the default `*`, send a static wildcard header instead of echoing
+    # each request's Origin back.
+    origins = app.config.get('CORS_ORIGINS') or ['*']
+    cors.init_app(
+        app,
+        resources={r"/api/*": {"origins": origins}},
+        allow_headers=["Content-Type", "Authorization"],
+        methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+        send_wildcard=(origins == ['*']),
+    )
     migrate.init_app(app, db)
     
     # JWT error handlers
@@ -49,6 +113,29 @@ def init_extensions(app):
             'error': 'missing_token'
         }), 401
     
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        # One round trip: the user row (kept in the identity map, so routes
+        # that load it next don't query again) plus any blocklist entry for
+        # this token or its login session.
+        from models.user import RevokedToken, User
+        try:
+            user_id = int(jwt_payload.get('sub'))
+        except (TypeError, ValueError):
+            return True
+        ids = [jwt_payload.get('jti')]
+        if jwt_payload.get('sid'):
+            ids.append(jwt_payload['sid'])
+        row = db.session.execute(
+            select(User, RevokedToken.jti)
+            .outerjoin(RevokedToken, RevokedToken.jti.in_(ids))
+            .where(User.id == user_id)
+        ).first()
+        if row is None:
+            return True
+        user, revoked_jti = row
+        return revoked_jti is not None or jwt_payload.get('ver', 0) != (user.token_version or 0)
+    
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
         print(f"❌ JWT Error: Token revoked - Header: {jwt_header}, Payload: {jwt_payload}")
@@ -0,0 +1,37 @@
+"""Gunicorn settings for production (Render).
+
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+`preload_app` builds the Flask app once in the master process so routes,
+model metadata and config are shared copy-on-write by the forked workers.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Threaded workers: requests mostly wait on the database, not the CPU.
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+preload_app = True
+timeout = 30
+keepalive = 2
+
+
+def pre_fork(server, worker):
+    # The optional startup schema patch runs in a thread of the master; let it
+    # finish so workers don't inherit a readiness flag that never gets set.
+    from app import READY
+
+    READY.wait()
+
+
+def post_fork(server, worker):
+    # Never share pooled DB connections across processes. Drop the ones
+    # inherited from the master without closing them out from under it.
+    from app import app
+    from extensions import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -3,7 +3,7 @@
 Designed to be run daily via Windows Task Scheduler / cron.
 
 Rules implemented:
-- If a member is inactive for 1 year (based on last_active_at), archive+deactivate.
+- If a member is inactive for 1 year (based on last_seen_at), archive+deactivate.
 - If an archived member has never activated within 30 days of creation, delete.
 
 This job is idempotent and safe to run multiple times.
@@ -13,11 +13,24 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 
-from sqlalchemy import func
+from sqlalchemy import delete, func, select, update
 
 from app import app
 from extensions import db
-from models.loyalty import LoyaltyMember
+from models.loyalty import LoyaltyMember, LoyaltyTransaction
+from utils.script_logging import get_script_logger
+
+log = get_script_logger(__name__)
+
+# Lifecycle columns differ between older/newer schemas; resolve once.
+HAS_LAST_SEEN = hasattr(LoyaltyMember, 'last_seen_at')
+HAS_IS_ARCHIVED = hasattr(LoyaltyMember, 'is_archived')
+HAS_ACTIVATED_AT = hasattr(LoyaltyMember, 'activated_at')
+HAS_ARCHIVED_AT = hasattr(LoyaltyMember, 'archived_at')
+HAS_DEACTIVATED_AT = hasattr(LoyaltyMember, 'deactivated_at')
+
+# Columns set on members archived for inactivity.
+_ARCHIVE_VALUES = {'is_active': False, 'is_archived': True}
 
 
 def run() -> dict[str, int]:
@@ -29,43 +42,68 @@ def run() -> dict[str, int]:
     deleted_count = 0
 
     with app.app_context():
-        # 1) Auto-deactivate/archive members inactive for 1 year.
-        # Only applies to members that have activated at least once.
-        if hasattr(LoyaltyMember, 'last_active_at') and hasattr(LoyaltyMember, 'is_archived'):
-            last_seen = func.coalesce(
-                LoyaltyMember.last_active_at,
-                LoyaltyMember.activated_at,
-                LoyaltyMember.created_at,
+        # 0) Fill last_seen_at on rows that predate its server default
+        # (an index lookup on IS NULL, not a scan).
+        if HAS_LAST_SEEN:
+            db.session.execute(
+                update(LoyaltyMember)
+                .where(LoyaltyMember.last_seen_at.is_(None))
+                .values(last_seen_at=func.coalesce(
+                    LoyaltyMember.last_active_at,
+                    LoyaltyMember.activated_at,
+                    LoyaltyMember.created_at,
+                ))
+                .execution_options(synchronize_session=False)
             )
 
-            q = LoyaltyMember.query.filter(
-                LoyaltyMember.is_active.is_(True),
-                LoyaltyMember.is_archived.is_(False),
-                LoyaltyMember.activated_at.isnot(None),
-                last_seen <= one_year_ago,
+        # 1) Auto-deactivate/archive members inactive for 1 year.
+        # Only applies to members that have activated at least once.
+        if HAS_LAST_SEEN and HAS_IS_ARCHIVED:
+            values = dict(_ARCHIVE_VALUES)
+            if HAS_ARCHIVED_AT:
+                values['archived_at'] = now
+            if HAS_DEACTIVATED_AT:
+                values['deactivated_at'] = now
+
+            # Single UPDATE; no member rows are loaded into the session.
+            result = db.session.execute(
+                update(LoyaltyMember)
+                .where(
+                    # Compiles to the predicate of the partial index
+                    # idx_loyalty_last_seen (database/optimize_db.py) on
+                    # each dialect: `is_active = 1 AND is_archived = 0` on
+                    # SQLite, `is_active AND NOT is_archived` on Postgres
+                    LoyaltyMember.is_active,
+                    ~LoyaltyMember.is_archived,
+                    LoyaltyMember.activated_at.isnot(None),
+                    # last_seen_at = COALESCE(last_active_at, activated_at, created_at)
+                    LoyaltyMember.last_seen_at <= one_year_ago,
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
             )
-
-            rows = q.all()
-            for m in rows:
-                m.is_active = False
-                m.is_archived = True
-                if hasattr(m, 'archived_at'):
-                    m.archived_at = now
-                if hasattr(m, 'deactivated_at'):
-                    m.deactivated_at = now
-            archived_count = len(rows)
+            archived_count = result.rowcount
 
         # 2) Auto-delete archived accounts that never activated within 30 days.
-        if hasattr(LoyaltyMember, 'is_archived') and hasattr(LoyaltyMember, 'activated_at'):
-            q_del = LoyaltyMember.query.filter(
+        if HAS_IS_ARCHIVED and HAS_ACTIVATED_AT:
+            stale = (
                 LoyaltyMember.is_archived.is_(True),
                 LoyaltyMember.activated_at.is_(None),
                 LoyaltyMember.created_at <= thirty_days_ago,
             )
-            rows_del = q_del.all()
-            for m in rows_del:
-                db.session.delete(m)
-            deleted_count = len(rows_del)
+            # Bulk DELETE skips the ORM cascade, so clear point history first
+            # (covers databases created without ON DELETE CASCADE).
+            db.session.execute(
+                delete(LoyaltyTransaction)
+                .where(LoyaltyTransaction.member_id.in_(select(LoyaltyMember.id).where(*stale)))
+                .execution_options(synchronize_session=False)
+            )
+            result = db.session.execute(
+                delete(LoyaltyMember)
+                .where(*stale)
+                .execution_options(synchronize_session=False)
+            )
+            deleted_count = result.rowcount
 
         db.session.commit()
 
@@ -77,5 +115,5 @@ def run() -> dict[str, int]:
 
 if __name__ == '__main__':
     result = run()
-    print(f"Archived (inactive>=1y): {result['archived']}")
-    print(f"Deleted (archived+unactivated>=30d): {result['deleted']}")
+    log.info(f"Archived (inactive>=1y): {result['archived']}")
+    log.info(f"Deleted (archived+unactivated>=30d): {result['deleted']}")
@@ -1,14 +1,29 @@
 """
 Database models package
+
+Models are imported lazily (PEP 562): `from models import Customer` only
+loads models/customer.py. Anything that needs the full mapper registry
+(create_all, migrations, string-based relationships) must call
+`load_all()` first; create_app() does this for the running app.
 """
-from .user import User
-from .product import Product, Category
-from .transaction import Transaction, TransactionItem
-from .customer import Customer
-from .loyalty import LoyaltyMember, LoyaltyTier, LoyaltyTransaction, LoyaltySetting
-from .setting import Setting
-from .promotion import Promotion
-from .refund_request import RefundRequest
+import importlib
+
+# Public name -> submodule that defines it
+_MODULES = {
+    'User': 'user',
+    'Product': 'product',
+    'Category': 'product',
+    'Transaction': 'transaction',
+    'TransactionItem': 'transaction',
+    'Customer': 'customer',
+    'LoyaltyMember': 'loyalty',
+    'LoyaltyTier': 'loyalty',
+    'LoyaltyTransaction': 'loyalty',
+    'LoyaltySetting': 'loyalty',
+    'Setting': 'setting',
+    'Promotion': 'promotion',
+    'RefundRequest': 'refund_request',
+}
 
 __all__ = [
     'User',
@@ -25,3 +40,18 @@ __all__ = [
     'Promotion',
     'RefundRequest'
 ]
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value  # cache: later lookups skip __getattr__
+    return value
+
+
+def load_all():
+    """Import every model module so all tables/mappers are registered."""
+    for module in sorted(set(_MODULES.values())):
+        importlib.import_module(f'.{module}', __name__)
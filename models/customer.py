@@ -1,8 +1,35 @@
 """
 Customer model
 """
+from __future__ import annotations
+
+from dataclasses import dataclass
 from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.orm import validates
 from extensions import db
+from models.functions import local_now
+
+
+@dataclass
+class CustomerRow:
+    """Customer.to_dict() as a slotted struct, for bulk JSON serialization"""
+    # Spelled out: dataclass(slots=True) needs Python 3.10
+    __slots__ = (
+        'id', 'name', 'email', 'phone', 'address', 'loyalty_points',
+        'total_purchases', 'transaction_count', 'is_active', 'created_at',
+    )
+    id: int
+    name: str
+    email: str | None
+    phone: str | None
+    address: str | None
+    loyalty_points: int | None
+    total_purchases: Decimal | int
+    transaction_count: int
+    is_active: bool | None
+    created_at: datetime | None
 
 
 class Customer(db.Model):
@@ -12,27 +39,47 @@ class Customer(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=True, index=True)
+    # Lowercased copy of email, so case-insensitive lookups are an index seek
+    email_lower = db.Column(db.String(100), nullable=True, index=True)
     phone = db.Column(db.String(20), unique=True, nullable=True, index=True)
     address = db.Column(db.Text, nullable=True)
     
     # Loyalty
     loyalty_points = db.Column(db.Integer, default=0)
     total_purchases = db.Column(db.Numeric(12, 2), default=0)
+    # Denormalized; kept in sync by Transaction insert/delete events
+    # (models/transaction.py) so to_dict() doesn't COUNT(*) per customer.
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
     
     # Status
     is_active = db.Column(db.Boolean, default=True)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
-    transactions = db.relationship('Transaction', backref='customer', lazy='dynamic')
+    transactions = db.relationship('Transaction', backref='customer')
+    
+    @validates('email')
+    def _sync_email_lower(self, key, email):
+        self.email_lower = email.strip().lower() if email else None
+        return email
     
-    @property
-    def transaction_count(self):
-        """Get total number of transactions"""
-        return self.transactions.count()
+    def to_row(self):
+        """Same fields as to_dict(), left as native values (see CustomerRow)"""
+        return CustomerRow(
+            self.id,
+            self.name,
+            self.email,
+            self.phone,
+            self.address,
+            self.loyalty_points,
+            self.total_purchases or 0,
+            self.transaction_count or 0,
+            self.is_active,
+            self.created_at,
+        )
     
     def to_dict(self):
         return {
@@ -43,7 +90,7 @@ class Customer(db.Model):
             'address': self.address,
             'loyalty_points': self.loyalty_points,
             'total_purchases': float(self.total_purchases) if self.total_purchases else 0,
-            'transaction_count': self.transaction_count,
+            'transaction_count': self.transaction_count or 0,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
@@ -0,0 +1,37 @@
+"""
+SQL functions shared by the models
+"""
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+class local_now(FunctionElement):
+    """Current timestamp in the database's local time zone.
+
+    Used as a server-side default in place of `datetime.now`, so timestamps
+    stay naive local time like the rest of the app on every backend.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(local_now)
+def _local_now_default(element, compiler, **kw):
+    # MySQL/MariaDB: session (server) time zone
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(local_now, 'postgresql')
+def _local_now_postgresql(element, compiler, **kw):
+    # timestamp without time zone, in the session time zone
+    return "LOCALTIMESTAMP"
+
+
+@compiles(local_now, 'sqlite')
+def _local_now_sqlite(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is UTC. SQLite compares datetimes as text,
+    # so write the same "YYYY-MM-DD HH:MM:SS.ffffff" SQLAlchemy's DateTime
+    # type stores and binds (%f only has milliseconds, hence the padding);
+    # otherwise a row sorts below a bound copy of its own timestamp.
+    return "(strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') || '000')"
@@ -1,8 +1,15 @@
 """
 Loyalty models for membership management
 """
+import json
+import secrets
 from datetime import datetime
+from sqlalchemy import event, func, or_
 from extensions import db
+from models.functions import local_now
+
+# EAN-13 check digit: the first 12 digits weighted 1,3,1,3,...
+_EAN13_WEIGHTS = (1, 3) * 6
 
 
 class LoyaltyTier(db.Model):
@@ -21,13 +28,30 @@ class LoyaltyTier(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
-    members = db.relationship('LoyaltyMember', backref='tier', lazy='dynamic')
+    members = db.relationship('LoyaltyMember', backref='tier')
     
-    def to_dict(self):
+    @classmethod
+    def with_member_counts(cls):
+        """Query of (tier, member count) rows: tiers and their counts come
+        back from one grouped statement"""
+        return (
+            db.session.query(cls, func.count(LoyaltyMember.id))
+            .outerjoin(LoyaltyMember, LoyaltyMember.tier_id == cls.id)
+            .group_by(cls.id)
+        )
+    
+    def to_dict(self, member_count=None):
+        """Serialize; pass `member_count` (e.g. from with_member_counts()) to skip the COUNT query"""
+        if member_count is None:
+            member_count = (
+                db.session.query(func.count(LoyaltyMember.id))
+                .filter(LoyaltyMember.tier_id == self.id)
+                .scalar()
+            )
         return {
             'id': self.id,
             'name': self.name,
@@ -39,7 +63,7 @@ class LoyaltyTier(db.Model):
             'icon': self.icon,
             'benefits': self.benefits,
             'is_active': self.is_active,
-            'member_count': self.members.count(),
+            'member_count': member_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
     
@@ -58,7 +82,7 @@ class LoyaltyMember(db.Model):
     
     # Member info
     tier_id = db.Column(db.Integer, db.ForeignKey('loyalty_tiers.id', ondelete='SET NULL'), default=1)
-    join_date = db.Column(db.DateTime, default=datetime.now)
+    join_date = db.Column(db.DateTime, default=local_now(), server_default=local_now())
     expiry_date = db.Column(db.DateTime, nullable=True)
     
     # Points tracking
@@ -81,18 +105,24 @@ class LoyaltyMember(db.Model):
     # Member app activity
     activated_at = db.Column(db.DateTime, nullable=True)
     last_active_at = db.Column(db.DateTime, nullable=True)
+    # COALESCE(last_active_at, activated_at, created_at), stored so the
+    # inactivity sweep is an index range scan. Starts at creation time (also
+    # for rows inserted outside the ORM) and is kept in sync by the attribute
+    # events below; bulk update() statements that set either source column
+    # must set last_seen_at as well.
+    last_seen_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), nullable=True, index=True)
 
     # Limited self-reactivation count for the member app.
     # Each transition from inactive->active consumes 1.
     reactivation_remaining = db.Column(db.Integer, default=3, nullable=False)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
     customer = db.relationship('Customer', backref=db.backref('loyalty_member', uselist=False))
-    point_transactions = db.relationship('LoyaltyTransaction', backref='member', lazy='dynamic', cascade='all, delete-orphan')
+    point_transactions = db.relationship('LoyaltyTransaction', backref='member', cascade='all, delete-orphan')
     
     def to_dict(self, include_customer=True, include_tier=True):
         data = {
@@ -119,24 +149,26 @@ class LoyaltyMember(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
         
-        if include_customer and self.customer:
+        customer = self.customer if include_customer else None
+        if customer:
             data['customer'] = {
-                'id': self.customer.id,
-                'name': self.customer.name,
-                'email': self.customer.email,
-                'phone': self.customer.phone,
-                'address': self.customer.address,
-                'total_purchases': float(self.customer.total_purchases) if self.customer.total_purchases else 0,
+                'id': customer.id,
+                'name': customer.name,
+                'email': customer.email,
+                'phone': customer.phone,
+                'address': customer.address,
+                'total_purchases': float(customer.total_purchases) if customer.total_purchases else 0,
             }
         
-        if include_tier and self.tier:
+        tier = self.tier if include_tier else None
+        if tier:
             data['tier'] = {
-                'id': self.tier.id,
-                'name': self.tier.name,
-                'discount_percent': float(self.tier.discount_percent) if self.tier.discount_percent else 0,
-                'points_multiplier': float(self.tier.points_multiplier) if self.tier.points_multiplier else 1,
-                'color': self.tier.color,
-                'icon': self.tier.icon,
+                'id': tier.id,
+                'name': tier.name,
+                'discount_percent': float(tier.discount_percent) if tier.discount_percent else 0,
+                'points_multiplier': float(tier.points_multiplier) if tier.points_multiplier else 1,
+                'color': tier.color,
+                'icon': tier.icon,
             }
         
         return data
@@ -144,35 +176,70 @@ class LoyaltyMember(db.Model):
     @staticmethod
     def generate_member_number():
         """Generate a unique member number"""
-        import random
-        import string
         prefix = 'VCS'
         year = datetime.now().strftime('%y')
-        random_part = ''.join(random.choices(string.digits, k=6))
+        random_part = f'{secrets.randbelow(10**6):06d}'
         return f'{prefix}{year}{random_part}'
     
     @staticmethod
     def generate_barcode():
         """Generate a unique barcode for the loyalty card"""
-        import random
         # EAN-13 compatible format: 13 digits starting with custom prefix
         prefix = '200'  # Internal use prefix
-        random_part = ''.join([str(random.randint(0, 9)) for _ in range(9)])
+        random_part = f'{secrets.randbelow(10**9):09d}'
         # Calculate check digit for EAN-13
         code = prefix + random_part
-        total = 0
-        for i, digit in enumerate(code):
-            if i % 2 == 0:
-                total += int(digit)
-            else:
-                total += int(digit) * 3
+        total = sum(w * int(d) for w, d in zip(_EAN13_WEIGHTS, code))
         check_digit = (10 - (total % 10)) % 10
         return code + str(check_digit)
     
+    @classmethod
+    def generate_identifiers(cls, count=1):
+        """Return `count` unused (member_number, card_barcode) pairs.
+        
+        Candidates are drawn in a batch (with ~10% headroom) and checked
+        against existing members in one query, instead of one lookup per guess.
+        """
+        pairs = []
+        seen = set()
+        while len(pairs) < count:
+            wanted = count - len(pairs)
+            candidates = [
+                (cls.generate_member_number(), cls.generate_barcode())
+                for _ in range(wanted + max(1, wanted // 10))
+            ]
+            rows = db.session.query(cls.member_number, cls.card_barcode).filter(
+                or_(
+                    cls.member_number.in_([number for number, _ in candidates]),
+                    cls.card_barcode.in_([barcode for _, barcode in candidates]),
+                )
+            ).all()
+            taken = {value for row in rows for value in row}
+            for number, barcode in candidates:
+                if len(pairs) == count:
+                    break
+                if number in taken or barcode in taken or number in seen or barcode in seen:
+                    continue
+                seen.update((number, barcode))
+                pairs.append((number, barcode))
+        return pairs
+    
     def __repr__(self):
         return f'<LoyaltyMember {self.member_number}>'
 
 
+@event.listens_for(LoyaltyMember.last_active_at, 'set')
+def _last_active_sets_last_seen(target, value, oldvalue, initiator):
+    if value is not None:
+        target.last_seen_at = value
+
+
+@event.listens_for(LoyaltyMember.activated_at, 'set')
+def _activation_sets_last_seen(target, value, oldvalue, initiator):
+    if value is not None and target.last_active_at is None:
+        target.last_seen_at = value
+
+
 class LoyaltyTransaction(db.Model):
     """Points transaction history"""
     __tablename__ = 'loyalty_transactions'
@@ -194,7 +261,7 @@ class LoyaltyTransaction(db.Model):
     adjusted_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
     
     # Relationships
     sale_transaction = db.relationship('Transaction', backref='loyalty_transactions')
@@ -215,6 +282,37 @@ class LoyaltyTransaction(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
     
+    # Plain columns of to_dict(), in key order; list_query() selects these first
+    _LIST_COLUMNS = (
+        'id', 'member_id', 'transaction_id', 'transaction_type', 'points',
+        'balance_after', 'description', 'reference_code', 'adjusted_by',
+    )
+    _LIST_FIELDS = _LIST_COLUMNS + ('adjuster_name', 'created_at')
+    
+    @classmethod
+    def list_query(cls):
+        """Column-only query for history lists: to_dict()'s fields plus the
+        adjuster's name through one outer join, with no ORM objects built"""
+        from models.user import User
+        return db.session.query(
+            *(getattr(cls, name) for name in cls._LIST_COLUMNS),
+            User.id, User.first_name, User.last_name, cls.created_at,
+        ).outerjoin(User, cls.adjusted_by == User.id)
+    
+    @classmethod
+    def list_dicts(cls, rows):
+        """to_dict()-shaped dicts from list_query() rows"""
+        fields = cls._LIST_FIELDS
+        n = len(cls._LIST_COLUMNS)
+        return [
+            dict(zip(fields, (
+                *row[:n],
+                f'{row[n + 1]} {row[n + 2]}' if row[n] is not None else None,
+                row[n + 3].isoformat() if row[n + 3] else None,
+            )))
+            for row in rows
+        ]
+    
     def __repr__(self):
         return f'<LoyaltyTransaction {self.id} - {self.transaction_type}: {self.points}>'
 
@@ -235,14 +333,25 @@ class LoyaltySetting(db.Model):
     last_modified_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
     modifier = db.relationship('User', backref='loyalty_setting_changes')
     
     def get_value(self):
-        """Get typed value based on setting_type"""
+        """Get typed value based on setting_type (scalars parsed once per raw value)"""
+        # JSON values are mutable: parse a fresh one per call (cheaper than
+        # deep-copying a memoized one)
+        if self.setting_type == 'json':
+            return self._parse_value()
+        key = (self.setting_type, self.setting_value)
+        cached = getattr(self, '_typed_value', None)
+        if cached is None or cached[0] != key:
+            cached = self._typed_value = (key, self._parse_value())
+        return cached[1]
+    
+    def _parse_value(self):
         if self.setting_type == 'number':
             try:
                 return float(self.setting_value)
@@ -251,7 +360,6 @@ class LoyaltySetting(db.Model):
         elif self.setting_type == 'boolean':
             return self.setting_value.lower() in ('true', '1', 'yes')
         elif self.setting_type == 'json':
-            import json
             try:
                 return json.loads(self.setting_value)
             except (ValueError, TypeError):
@@ -1,8 +1,9 @@
 """
 Product and Category models
 """
-from datetime import datetime
+from sqlalchemy import func
 from extensions import db
+from models.functions import local_now
 
 
 class Category(db.Model):
@@ -17,13 +18,30 @@ class Category(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
-    products = db.relationship('Product', backref='category', lazy='dynamic')
-    
-    def to_dict(self):
+    products = db.relationship('Product', backref='category')
+    
+    @classmethod
+    def with_product_counts(cls):
+        """Query of (category, product count) rows: categories and their
+        counts come back from one grouped statement"""
+        return (
+            db.session.query(cls, func.count(Product.id))
+            .outerjoin(Product, Product.category_id == cls.id)
+            .group_by(cls.id)
+        )
+    
+    def to_dict(self, product_count=None):
+        """Serialize; pass `product_count` (e.g. from with_product_counts()) to skip the COUNT query"""
+        if product_count is None:
+            product_count = (
+                db.session.query(func.count(Product.id))
+                .filter(Product.category_id == self.id)
+                .scalar()
+            )
         return {
             'id': self.id,
             'name': self.name,
@@ -31,7 +49,7 @@ class Category(db.Model):
             'icon': self.icon,
             'color': self.color,
             'is_active': self.is_active,
-            'product_count': self.products.count()
+            'product_count': product_count
         }
     
     def __repr__(self):
@@ -48,10 +66,10 @@ class Product(db.Model):
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     
-    # Pricing
-    cost_price = db.Column(db.Numeric(10, 2), nullable=False, default=0)
-    selling_price = db.Column(db.Numeric(10, 2), nullable=False)
-    discount_percent = db.Column(db.Numeric(5, 2), default=0)
+    # Pricing (loaded as float)
+    cost_price = db.Column(db.Numeric(10, 2, asdecimal=False), nullable=False, default=0)
+    selling_price = db.Column(db.Numeric(10, 2, asdecimal=False), nullable=False)
+    discount_percent = db.Column(db.Numeric(5, 2, asdecimal=False), default=0)
     points_cost = db.Column(db.Integer, nullable=False, default=0)
     
     # Inventory
@@ -70,11 +88,11 @@ class Product(db.Model):
     is_featured = db.Column(db.Boolean, default=False)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
-    transaction_items = db.relationship('TransactionItem', backref='product', lazy='dynamic')
+    transaction_items = db.relationship('TransactionItem', backref='product')
     
     @property
     def final_price(self):
@@ -95,6 +113,15 @@ class Product(db.Model):
         return self.stock_quantity <= 0
     
     def to_dict(self):
+        # Cast each price once; final_price/is_low_stock/is_out_of_stock
+        # are inlined from the properties above.
+        selling_price = float(self.selling_price)
+        discount_percent = float(self.discount_percent) if self.discount_percent else 0
+        final_price = selling_price - selling_price * (discount_percent / 100) if discount_percent else selling_price
+        stock_quantity = self.stock_quantity
+        category = self.category
+        created_at = self.created_at
+        updated_at = self.updated_at
         return {
             'id': self.id,
             'sku': self.sku,
@@ -102,22 +129,22 @@ class Product(db.Model):
             'name': self.name,
             'description': self.description,
             'cost_price': float(self.cost_price),
-            'selling_price': float(self.selling_price),
-            'discount_percent': float(self.discount_percent) if self.discount_percent else 0,
+            'selling_price': selling_price,
+            'discount_percent': discount_percent,
             'points_cost': int(self.points_cost or 0),
-            'final_price': self.final_price,
-            'stock_quantity': self.stock_quantity,
+            'final_price': final_price,
+            'stock_quantity': stock_quantity,
             'low_stock_threshold': self.low_stock_threshold,
             'unit': self.unit,
             'category_id': self.category_id,
-            'category_name': self.category.name if self.category else None,
+            'category_name': category.name if category else None,
             'image_url': self.image_url,
             'is_active': self.is_active,
             'is_featured': self.is_featured,
-            'is_low_stock': self.is_low_stock,
-            'is_out_of_stock': self.is_out_of_stock,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'is_low_stock': stock_quantity <= self.low_stock_threshold,
+            'is_out_of_stock': stock_quantity <= 0,
+            'created_at': created_at.isoformat() if created_at else None,
+            'updated_at': updated_at.isoformat() if updated_at else None
         }
     
     def __repr__(self):
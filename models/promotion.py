@@ -2,7 +2,7 @@
 Promotion model for loyalty program
 """
 from extensions import db
-from datetime import datetime
+from models.functions import local_now
 
 
 class Promotion(db.Model):
@@ -15,8 +15,8 @@ class Promotion(db.Model):
     start_date = db.Column(db.DateTime, nullable=True)
     end_date = db.Column(db.DateTime, nullable=True)
     is_active = db.Column(db.Boolean, default=False, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
 
     def to_dict(self):
         return {
@@ -6,9 +6,8 @@ Supervisors can also perform an instant refund (recorded as an approved request)
 
 from __future__ import annotations
 
-from datetime import datetime
-
 from extensions import db
+from models.functions import local_now
 
 
 class RefundRequest(db.Model):
@@ -50,11 +49,11 @@ class RefundRequest(db.Model):
     )
     rejected_at = db.Column(db.DateTime, nullable=True)
 
-    created_at = db.Column(db.DateTime, default=datetime.now, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), index=True)
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
 
     # Relationships
-    transaction = db.relationship('Transaction', backref=db.backref('refund_requests', lazy='dynamic'))
+    transaction = db.relationship('Transaction', backref='refund_requests')
 
     def to_dict(self, include_transaction: bool = False) -> dict:
         data = {
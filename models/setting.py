@@ -1,8 +1,9 @@
 """Application settings model (DB-backed)."""
 
-from datetime import datetime
+import json
 
 from extensions import db
+from models.functions import local_now
 
 
 class Setting(db.Model):
@@ -14,14 +15,27 @@ class Setting(db.Model):
     setting_type = db.Column(db.String(20), default='string')
     description = db.Column(db.String(255))
 
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
     updated_at = db.Column(
         db.DateTime,
-        default=datetime.now,
-        onupdate=datetime.now,
+        default=local_now(),
+        server_default=local_now(),
+        onupdate=local_now(),
     )
 
     def get_value(self):
+        # JSON values are mutable, and a fresh json.loads is cheaper than
+        # deep-copying a memoized one, so only scalars are memoized.
+        if self.setting_type == 'json':
+            return self._parse_value()
+        # Parsed once per (type, raw value); assigning either re-parses.
+        key = (self.setting_type, self.setting_value)
+        cached = getattr(self, '_typed_value', None)
+        if cached is None or cached[0] != key:
+            cached = self._typed_value = (key, self._parse_value())
+        return cached[1]
+
+    def _parse_value(self):
         if self.setting_type == 'number':
             try:
                 return float(self.setting_value)
@@ -30,8 +44,6 @@ class Setting(db.Model):
         if self.setting_type == 'boolean':
             return str(self.setting_value).lower() in ('true', '1', 'yes')
         if self.setting_type == 'json':
-            import json
-
             try:
                 return json.loads(self.setting_value or '{}')
             except (ValueError, TypeError):
@@ -1,8 +1,75 @@
 """
 Transaction and TransactionItem models
 """
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass
 from datetime import datetime
+
+from sqlalchemy import event, inspect, text
 from extensions import db
+from models.functions import local_now
+
+
+def generate_transaction_id():
+    """Receipt code TXN-<local timestamp>-<6 random hex digits>.
+    
+    Needs nothing from the row, so it is filled in before the INSERT; the
+    random suffix keeps sales made in the same second apart.
+    """
+    return f"TXN-{datetime.now():%Y%m%d%H%M%S}-{secrets.token_hex(3).upper()}"
+
+
+@dataclass
+class TransactionItemRow:
+    """TransactionItem.to_dict() as a slotted struct, for bulk JSON serialization"""
+    # Spelled out: dataclass(slots=True) needs Python 3.10
+    __slots__ = (
+        'id', 'product_id', 'product_name', 'product_sku', 'unit_price',
+        'quantity', 'discount_percent', 'subtotal',
+    )
+    id: int
+    product_id: int
+    product_name: str
+    product_sku: str
+    unit_price: float
+    quantity: int
+    discount_percent: float
+    subtotal: float
+
+
+@dataclass
+class TransactionRow:
+    """Transaction.to_dict() as a slotted struct, for bulk JSON serialization"""
+    # Spelled out: dataclass(slots=True) needs Python 3.10
+    __slots__ = (
+        'id', 'transaction_id', 'customer_id', 'customer_name', 'user_id',
+        'cashier_name', 'subtotal', 'discount_amount', 'tax_amount',
+        'total_amount', 'payment_method', 'amount_received', 'change_amount',
+        'voucher_code', 'voucher_discount', 'status', 'notes', 'item_count',
+        'created_at', 'items',
+    )
+    id: int
+    transaction_id: str
+    customer_id: int | None
+    customer_name: str | None
+    user_id: int
+    cashier_name: str | None
+    subtotal: float
+    discount_amount: float
+    tax_amount: float
+    total_amount: float
+    payment_method: str
+    amount_received: float
+    change_amount: float
+    voucher_code: str | None
+    voucher_discount: float
+    status: str | None
+    notes: str | None
+    item_count: int
+    created_at: datetime | None
+    items: list[TransactionItemRow]
 
 
 class Transaction(db.Model):
@@ -10,28 +77,32 @@ class Transaction(db.Model):
     __tablename__ = 'transactions'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    transaction_id = db.Column(db.String(50), unique=True, nullable=False, index=True)
+    transaction_id = db.Column(db.String(50), unique=True, nullable=False, index=True, default=generate_transaction_id)
     
-    # Customer (optional)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=True)
+    # Customer (optional). active_history loads the old value on reassignment
+    # so the customer transaction counters can move it.
+    customer_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=True),
+        active_history=True,
+    )
     
     # Cashier
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
-    # Amounts
-    subtotal = db.Column(db.Numeric(12, 2), nullable=False)
-    discount_amount = db.Column(db.Numeric(12, 2), default=0)
-    tax_amount = db.Column(db.Numeric(12, 2), default=0)
-    total_amount = db.Column(db.Numeric(12, 2), nullable=False)
+    # Amounts (loaded as float: display and reporting values only)
+    subtotal = db.Column(db.Numeric(12, 2, asdecimal=False), nullable=False)
+    discount_amount = db.Column(db.Numeric(12, 2, asdecimal=False), default=0)
+    tax_amount = db.Column(db.Numeric(12, 2, asdecimal=False), default=0)
+    total_amount = db.Column(db.Numeric(12, 2, asdecimal=False), nullable=False)
     
     # Payment
     payment_method = db.Column(db.String(20), nullable=False)  # cash, card, gcash, maya
-    amount_received = db.Column(db.Numeric(12, 2), nullable=False)
-    change_amount = db.Column(db.Numeric(12, 2), default=0)
+    amount_received = db.Column(db.Numeric(12, 2, asdecimal=False), nullable=False)
+    change_amount = db.Column(db.Numeric(12, 2, asdecimal=False), default=0)
     
     # Voucher
     voucher_code = db.Column(db.String(50), nullable=True)
-    voucher_discount = db.Column(db.Numeric(12, 2), default=0)
+    voucher_discount = db.Column(db.Numeric(12, 2, asdecimal=False), default=0)
     
     # Status: pending, completed, voided, refunded
     status = db.Column(db.String(20), default='completed')
@@ -39,22 +110,42 @@ class Transaction(db.Model):
     # Notes
     notes = db.Column(db.Text, nullable=True)
     
+    # Total quantity across items, set when the sale is recorded
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
-    items = db.relationship('TransactionItem', backref='transaction', lazy='joined', cascade='all, delete-orphan')
+    items = db.relationship('TransactionItem', backref='transaction', lazy='selectin', cascade='all, delete-orphan')
     
-    def generate_transaction_id(self):
-        """Generate unique transaction ID"""
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        return f"TXN-{timestamp}-{self.id or 0:04d}"
-    
-    @property
-    def item_count(self):
-        """Get total number of items"""
-        return sum(item.quantity for item in self.items)
+    def to_row(self):
+        """Same fields as to_dict(), left as native values (see TransactionRow)"""
+        customer = self.customer
+        cashier = self.cashier
+        return TransactionRow(
+            self.id,
+            self.transaction_id,
+            self.customer_id,
+            customer.name if customer else None,
+            self.user_id,
+            cashier.display_name if cashier else None,
+            float(self.subtotal),
+            float(self.discount_amount) if self.discount_amount else 0,
+            float(self.tax_amount) if self.tax_amount else 0,
+            float(self.total_amount),
+            self.payment_method,
+            float(self.amount_received),
+            float(self.change_amount) if self.change_amount else 0,
+            self.voucher_code,
+            float(self.voucher_discount) if self.voucher_discount else 0,
+            self.status,
+            self.notes,
+            self.item_count,
+            self.created_at,
+            [item.to_row() for item in self.items],
+        )
     
     def to_dict(self, include_items=True):
         data = {
@@ -86,6 +177,41 @@ class Transaction(db.Model):
         return f'<Transaction {self.transaction_id}>'
 
 
+_BUMP_CUSTOMER_TRANSACTION_COUNT = text(
+    "UPDATE customers SET transaction_count = transaction_count + :delta WHERE id = :customer_id"
+)
+
+
+# Bulk update()/delete() statements skip these per-row events; callers that
+# change customer_id in bulk adjust the affected customers themselves.
+@event.listens_for(Transaction, 'after_insert')
+def _count_customer_transaction(mapper, connection, target):
+    """Keep Customer.transaction_count in step with new transactions"""
+    if target.customer_id is not None:
+        connection.execute(_BUMP_CUSTOMER_TRANSACTION_COUNT, {'delta': 1, 'customer_id': target.customer_id})
+
+
+@event.listens_for(Transaction, 'after_delete')
+def _uncount_customer_transaction(mapper, connection, target):
+    """Keep Customer.transaction_count in step with deleted transactions"""
+    if target.customer_id is not None:
+        connection.execute(_BUMP_CUSTOMER_TRANSACTION_COUNT, {'delta': -1, 'customer_id': target.customer_id})
+
+
+@event.listens_for(Transaction, 'after_update')
+def _move_customer_transaction(mapper, connection, target):
+    """Move the count when a transaction is reassigned to another customer"""
+    history = inspect(target).attrs.customer_id.history
+    if not history.has_changes():
+        return
+    for customer_id in history.deleted:
+        if customer_id is not None:
+            connection.execute(_BUMP_CUSTOMER_TRANSACTION_COUNT, {'delta': -1, 'customer_id': customer_id})
+    for customer_id in history.added:
+        if customer_id is not None:
+            connection.execute(_BUMP_CUSTOMER_TRANSACTION_COUNT, {'delta': 1, 'customer_id': customer_id})
+
+
 class TransactionItem(db.Model):
     """TransactionItem model for individual items in a transaction"""
     __tablename__ = 'transaction_items'
@@ -99,10 +225,23 @@ class TransactionItem(db.Model):
     product_sku = db.Column(db.String(50), nullable=False)
     
     # Pricing at time of sale
-    unit_price = db.Column(db.Numeric(10, 2), nullable=False)
+    unit_price = db.Column(db.Numeric(10, 2, asdecimal=False), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
-    discount_percent = db.Column(db.Numeric(5, 2), default=0)
-    subtotal = db.Column(db.Numeric(12, 2), nullable=False)
+    discount_percent = db.Column(db.Numeric(5, 2, asdecimal=False), default=0)
+    subtotal = db.Column(db.Numeric(12, 2, asdecimal=False), nullable=False)
+    
+    def to_row(self):
+        """Same fields as to_dict(), left as native values (see TransactionItemRow)"""
+        return TransactionItemRow(
+            self.id,
+            self.product_id,
+            self.product_name,
+            self.product_sku,
+            float(self.unit_price),
+            self.quantity,
+            float(self.discount_percent) if self.discount_percent else 0,
+            float(self.subtotal),
+        )
     
     def to_dict(self):
         return {
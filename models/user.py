@@ -1,9 +1,92 @@
 """
 User model for authentication and user management
 """
-from datetime import datetime
+import functools
+import os
+import secrets
+import threading
+
+from flask import current_app, has_app_context
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import validates
 from extensions import db
+from models.functions import local_now
+
+
+def _hash_method():
+    """Configured werkzeug method for new hashes (PASSWORD_HASH_METHOD)"""
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+    return 'scrypt'
+
+
+@functools.lru_cache(maxsize=4)
+def _hash_slots(limit):
+    return threading.BoundedSemaphore(limit)
+
+
+def _hash_gate():
+    """Semaphore capping concurrent hash computations (PASSWORD_HASH_CONCURRENCY)"""
+    limit = None
+    if has_app_context():
+        limit = current_app.config.get('PASSWORD_HASH_CONCURRENCY')
+    return _hash_slots(max(1, int(limit or os.cpu_count() or 1)))
+
+
+def _check_hash(stored_hash, secret):
+    # scrypt holds ~32 MB and a core for the whole check; with gthread
+    # workers every thread could be hashing at once, so extra logins wait
+    # here instead of oversubscribing the CPU and memory.
+    with _hash_gate():
+        return check_password_hash(stored_hash, secret)
+
+
+def hash_secret(secret):
+    """Hash a password or PIN with the configured method"""
+    with _hash_gate():
+        return generate_password_hash(secret, method=_hash_method())
+
+
+@functools.lru_cache(maxsize=4)
+def _method_prefix(method):
+    # Fully spelled-out method ("scrypt" -> "scrypt:32768:8:1") as stored
+    # in front of the salt
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def _is_stale(stored_hash):
+    """True when `stored_hash` wasn't made with the configured method/cost"""
+    return stored_hash.split('$', 1)[0] != _method_prefix(_hash_method())
+
+
+@functools.lru_cache(maxsize=4)
+def _dummy_hash(method):
+    # Throwaway hash with the configured method and cost
+    return generate_password_hash(secrets.token_hex(16), method=method)
+
+
+def reject_secret(secret):
+    """Return False after a full-cost hash check.
+
+    Used when there is no stored hash to check against (unknown username,
+    no PIN set), so the response takes as long as a real mismatch and its
+    timing doesn't reveal which case it was.
+    """
+    _check_hash(_dummy_hash(_hash_method()), secret or '')
+    return False
+
+
+# users.display_name width. Two 50-character names plus the space come to
+# 101, so compose_display_name trims to fit instead of widening deployed columns.
+DISPLAY_NAME_LENGTH = 100
+
+
+def compose_display_name(first_name, last_name, nickname=None):
+    """Nickname if set, else "First Last" (stored in users.display_name)"""
+    if nickname and nickname.strip():
+        return nickname.strip()
+    return f"{first_name or ''} {last_name or ''}".strip()[:DISPLAY_NAME_LENGTH]
 
 
 class User(db.Model):
@@ -20,6 +103,9 @@ class User(db.Model):
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     nickname = db.Column(db.String(50), nullable=True)
+    # Preferred name for UI/receipts, kept in sync by _sync_display_name so
+    # listings can read it as a plain column
+    display_name = db.Column(db.String(DISPLAY_NAME_LENGTH), nullable=False, default='', index=True)
     phone = db.Column(db.String(20), nullable=True)
     address = db.Column(db.String(500), nullable=True)  # Home address for security
     avatar_url = db.Column(db.String(255), nullable=True)
@@ -31,13 +117,16 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     is_logged_in = db.Column(db.Boolean, default=False)
     last_login = db.Column(db.DateTime, nullable=True)
+    # Stamped into every token; bumped by "log out all devices" to revoke
+    # all the ones already handed out
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
+    updated_at = db.Column(db.DateTime, default=local_now(), server_default=local_now(), onupdate=local_now())
     
     # Relationships
-    transactions = db.relationship('Transaction', backref='cashier', lazy='dynamic')
+    transactions = db.relationship('Transaction', backref='cashier')
     
     def __init__(self, username, first_name, last_name, password, role='cashier', **kwargs):
         self.username = username
@@ -51,36 +140,46 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_secret(password)
     
     def check_password(self, password):
-        """Verify password"""
-        return check_password_hash(self.password_hash, password)
+        """Verify password; a correct password re-hashes a stale hash (caller commits)"""
+        if not self.password_hash:
+            return reject_secret(password)
+        if not _check_hash(self.password_hash, password):
+            return False
+        if _is_stale(self.password_hash):
+            self.password_hash = hash_secret(password)
+        return True
     
     def set_pin(self, pin):
         """Hash and set PIN"""
         if pin and len(pin) == 4 and pin.isdigit():
-            self.pin_hash = generate_password_hash(pin)
+            self.pin_hash = hash_secret(pin)
         else:
             raise ValueError("PIN must be a 4-digit number")
     
     def check_pin(self, pin):
-        """Verify PIN"""
-        if self.pin_hash:
-            return check_password_hash(self.pin_hash, pin)
-        return False
+        """Verify PIN; a correct PIN re-hashes a stale hash (caller commits)"""
+        if not self.pin_hash:
+            return reject_secret(pin)
+        if not _check_hash(self.pin_hash, pin):
+            return False
+        if _is_stale(self.pin_hash):
+            self.pin_hash = hash_secret(pin)
+        return True
     
     @property
     def full_name(self):
         """Get full name"""
         return f"{self.first_name} {self.last_name}"
 
-    @property
-    def display_name(self):
-        """Preferred display name for UI/receipts"""
-        if self.nickname and self.nickname.strip():
-            return self.nickname.strip()
-        return self.full_name
+    @validates('first_name', 'last_name', 'nickname')
+    def _sync_display_name(self, key, value):
+        names = {'first_name': self.first_name, 'last_name': self.last_name, 'nickname': self.nickname}
+        names[key] = value
+        self.display_name = compose_display_name(**names)
+        return value
     
     @property
     def is_supervisor(self):
@@ -115,6 +214,18 @@ class User(db.Model):
         return f'<User {self.username} ({self.role})>'
 
 
+class RevokedToken(db.Model):
+    """Blocklist of token ids (`jti`) and login sessions (`sid`) ended by logout"""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    # When the revoked token would have expired anyway; older rows are pruned
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
+
+
 class ActivityLog(db.Model):
     """Activity log for audit trail"""
     __tablename__ = 'activity_logs'
@@ -124,7 +235,8 @@ class ActivityLog(db.Model):
     action = db.Column(db.String(100), nullable=False)
     entity_type = db.Column(db.String(50), nullable=True)
     entity_id = db.Column(db.Integer, nullable=True)
-    details = db.Column(db.JSON, nullable=True)
+    # JSONB on Postgres (binary, indexable with GIN); plain JSON elsewhere
+    details = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
     ip_address = db.Column(db.String(45), nullable=True)
     user_agent = db.Column(db.String(255), nullable=True)
 
@@ -132,7 +244,7 @@ class ActivityLog(db.Model):
     is_archived = db.Column(db.Boolean, default=False, nullable=False)
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, default=local_now(), server_default=local_now())
     
     # Relationships
     user = db.relationship('User', backref='activity_logs')
@@ -3,103 +3,187 @@
 Provides read access for authenticated users and delete access for supervisors.
 """
 
+from datetime import datetime
+
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import get_jwt, jwt_required
+from flask_jwt_extended import jwt_required
+from sqlalchemy import bindparam, delete, select, tuple_, update
 
 from extensions import db
 from models.user import ActivityLog, User
+from utils.json_provider import native_json_response
+from utils.rbac import require_supervisor
 
+# Handlers don't catch unexpected errors themselves: they fall through to the
+# app's 500 handler, which rolls the session back and returns a generic JSON
+# error instead of the exception text.
 activity_logs_bp = Blueprint('activity_logs', __name__)
 
+# Built once at import; the filter, cursor and limit are bound per request,
+# so every call reuses the same compiled SQL from the engine's statement
+# cache. Plain columns (the user's stored display name joined in) rather than
+# ORM objects: the listing only reads them, so no instances are built.
+_RECENT_LOGS = (
+    select(
+        ActivityLog.id,
+        ActivityLog.user_id,
+        ActivityLog.action,
+        ActivityLog.entity_type,
+        ActivityLog.entity_id,
+        ActivityLog.details,
+        ActivityLog.is_archived,
+        ActivityLog.created_at,
+        User.display_name,
+    )
+    .outerjoin(User, User.id == ActivityLog.user_id)
+    .where(ActivityLog.is_archived == bindparam('archived'))
+    .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+    .limit(bindparam('lim'))
+)
+# Next page: keyset on (created_at, id) instead of OFFSET, so deep pages cost
+# the same index range scan as the first one.
+_LOGS_BEFORE = _RECENT_LOGS.where(
+    tuple_(ActivityLog.created_at, ActivityLog.id) < tuple_(
+        bindparam('before_ts', type_=ActivityLog.created_at.type),
+        bindparam('before_id', type_=ActivityLog.id.type),
+    )
+)
+
+
+def _log_dict(row):
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        # No joined user (deleted, or logged by the system)
+        'user_name': 'System' if row['display_name'] is None else row['display_name'],
+        'action': row['action'],
+        'entity_type': row['entity_type'],
+        'entity_id': row['entity_id'],
+        'details': row['details'],
+        'is_archived': bool(row['is_archived']),
+        # ISO 8601 (or null) straight from the JSON encoder
+        'created_at': row['created_at'],
+    }
+
 
 @activity_logs_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_activity_logs():
-    """Get recent activity logs."""
-    try:
-        limit = request.args.get('limit', 50, type=int)
-        limit = max(1, min(limit, 200))
-
-        # archived=1 -> archived logs, archived=0 -> active logs (default)
-        archived = request.args.get('archived', 0, type=int)
-        show_archived = bool(archived)
-
-        logs_query = ActivityLog.query
-        logs_query = logs_query.filter(ActivityLog.is_archived.is_(show_archived))
-        logs = logs_query.order_by(ActivityLog.created_at.desc()).limit(limit).all()
-
-        data = []
-        for log in logs:
-            user_name = 'System'
-            if log.user_id:
-                user = User.query.get(log.user_id)
-                if user:
-                    user_name = getattr(user, 'display_name', None) or user.full_name
-
-            data.append({
-                'id': log.id,
-                'user_id': log.user_id,
-                'user_name': user_name,
-                'action': log.action,
-                'entity_type': log.entity_type,
-                'entity_id': log.entity_id,
-                'details': log.details,
-                'is_archived': bool(getattr(log, 'is_archived', False)),
-                'created_at': log.created_at.isoformat() if log.created_at else None,
-            })
-
-        return jsonify({'success': True, 'data': data}), 200
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+    """Get recent activity logs, newest first.
+
+    Pass the previous response's next_cursor back as ?before_ts=&before_id=
+    to fetch the page after it.
+    """
+    limit = request.args.get('limit', 50, type=int)
+    limit = max(1, min(limit, 200))
+
+    # archived=1 -> archived logs, archived=0 -> active logs (default)
+    archived = request.args.get('archived', 0, type=int)
+    show_archived = bool(archived)
+
+    params = {'archived': show_archived, 'lim': limit}
+    before_ts = request.args.get('before_ts')
+    before_id = request.args.get('before_id', type=int)
+    if before_ts or before_id is not None:
+        try:
+            params['before_ts'] = datetime.fromisoformat(before_ts)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Invalid before_ts'}), 400
+        if before_id is None:
+            return jsonify({'success': False, 'message': 'before_id is required with before_ts'}), 400
+        params['before_id'] = before_id
+        stmt = _LOGS_BEFORE
+    else:
+        stmt = _RECENT_LOGS
+
+    # Rows are fetched in batches of 50 and turned into output dicts as
+    # they arrive
+    rows = db.session.execute(stmt, params, execution_options={'yield_per': 50}).mappings()
+    data = [_log_dict(row) for row in rows]
+
+    # A short page means there is nothing older to fetch
+    next_cursor = None
+    if len(data) == limit and data[-1]['created_at']:
+        next_cursor = {'before_ts': data[-1]['created_at'], 'before_id': data[-1]['id']}
+
+    return native_json_response({'success': True, 'data': data, 'next_cursor': next_cursor})
 
 
 @activity_logs_bp.route('/<int:log_id>', methods=['DELETE'])
 @jwt_required()
+@require_supervisor
 def delete_activity_log(log_id: int):
     """Archive a single activity log entry (supervisor only).
 
     Use ?hard=true for permanent deletion.
     """
-    try:
-        claims = get_jwt()
-        if claims.get('role') != 'supervisor':
-            return jsonify({'success': False, 'message': 'Supervisor access required'}), 403
-
-        hard = request.args.get('hard', 'false').lower() in {'1', 'true', 'yes', 'on'}
+    hard = request.args.get('hard', 'false').lower() in {'1', 'true', 'yes', 'on'}
 
-        log = ActivityLog.query.get(log_id)
-        if not log:
-            return jsonify({'success': False, 'message': 'Activity log not found'}), 404
+    log = db.session.get(ActivityLog, log_id)
+    if not log:
+        return jsonify({'success': False, 'message': 'Activity log not found'}), 404
 
-        if hard:
-            db.session.delete(log)
-            db.session.commit()
-            return jsonify({'success': True, 'message': 'Activity log deleted'}), 200
-
-        log.is_archived = True
+    if hard:
+        db.session.delete(log)
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Activity log archived'}), 200
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'success': False, 'message': str(e)}), 500
+        return jsonify({'success': True, 'message': 'Activity log deleted'}), 200
+
+    log.is_archived = True
+    db.session.commit()
+    return jsonify({'success': True, 'message': 'Activity log archived'}), 200
 
 
 @activity_logs_bp.route('/<int:log_id>/restore', methods=['PATCH'])
 @jwt_required()
+@require_supervisor
 def restore_activity_log(log_id: int):
     """Restore an archived activity log entry (supervisor only)."""
-    try:
-        claims = get_jwt()
-        if claims.get('role') != 'supervisor':
-            return jsonify({'success': False, 'message': 'Supervisor access required'}), 403
+    log = db.session.get(ActivityLog, log_id)
+    if not log:
+        return jsonify({'success': False, 'message': 'Activity log not found'}), 404
 
-        log = ActivityLog.query.get(log_id)
-        if not log:
-            return jsonify({'success': False, 'message': 'Activity log not found'}), 404
+    log.is_archived = False
+    db.session.commit()
+    return jsonify({'success': True, 'message': 'Activity log restored'}), 200
 
-        log.is_archived = False
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Activity log restored'}), 200
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'success': False, 'message': str(e)}), 500
+
+# Bulk action -> past tense for the response message
+_BULK_ACTIONS = {'archive': 'archived', 'restore': 'restored', 'hard_delete': 'deleted'}
+_BULK_MAX_IDS = 1000
+
+
+@activity_logs_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@require_supervisor
+def bulk_activity_logs():
+    """Archive, restore or delete many log entries at once (supervisor only).
+
+    Body: {"ids": [...], "action": "archive" | "restore" | "hard_delete"}.
+    One UPDATE/DELETE and one commit for the whole batch.
+    """
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in _BULK_ACTIONS:
+        return jsonify({'success': False, 'message': 'action must be archive, restore or hard_delete'}), 400
+
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return jsonify({'success': False, 'message': 'ids must be a non-empty list'}), 400
+    try:
+        ids = {int(log_id) for log_id in ids}
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'ids must be integers'}), 400
+    if len(ids) > _BULK_MAX_IDS:
+        return jsonify({'success': False, 'message': f'At most {_BULK_MAX_IDS} ids per request'}), 400
+
+    if action == 'hard_delete':
+        stmt = delete(ActivityLog).where(ActivityLog.id.in_(ids))
+    else:
+        stmt = update(ActivityLog).where(ActivityLog.id.in_(ids)).values(is_archived=(action == 'archive'))
+    result = db.session.execute(stmt, execution_options={'synchronize_session': False})
+    db.session.commit()
+    return jsonify({
+        'success': True,
+        'message': f'{result.rowcount} activity log(s) {_BULK_ACTIONS[action]}',
+        'data': {'affected': result.rowcount},
+    }), 200
@@ -1,9 +1,12 @@
 """
 Authentication routes - Login, Logout, Token management
 """
-from datetime import datetime
+from datetime import datetime, timedelta
+import hmac
 import re
-from flask import Blueprint, request, jsonify
+import string
+import uuid
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
@@ -11,20 +14,99 @@ from flask_jwt_extended import (
     get_jwt_identity,
     get_jwt
 )
+from sqlalchemy import delete, select
 from sqlalchemy.exc import SQLAlchemyError
 from extensions import db
-from models.user import User
+from models.user import RevokedToken, User, reject_secret
+from utils.ttl_cache import TTLCache
 
 auth_bp = Blueprint('auth', __name__)
 
 
+# How stale users.last_login may get before a login rewrites it
+_LAST_LOGIN_RESOLUTION = timedelta(minutes=1)
+
 _EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_PHONE_RE = re.compile(r"\d{11,12}")
+
+# Password strength: required character classes, checked in one pass
+_PW_UPPER = frozenset(string.ascii_uppercase)
+_PW_DIGIT = frozenset(string.digits)
+_PW_ALNUM = frozenset(string.ascii_letters + string.digits)
+_PW_HAS_UPPER, _PW_HAS_DIGIT, _PW_HAS_SPECIAL = 1, 2, 4
+_PW_RULES = (
+    (_PW_HAS_UPPER, 'Password must contain at least 1 uppercase letter'),
+    (_PW_HAS_DIGIT, 'Password must contain at least 1 number'),
+    (_PW_HAS_SPECIAL, 'Password must contain at least 1 special character'),
+)
 
 
 def _is_valid_email(value: str) -> bool:
     return bool(_EMAIL_RE.match((value or "").strip()))
 
 
+# Signed access tokens by user id, stamped with the login session, claims
+# and credential state they were signed for. A token is handed out again
+# while at least half its lifetime is left and the stamp still matches, so
+# repeated refreshes skip the signing. A new login is a new session, so it
+# never gets a token another session's logout could have revoked; the rest
+# of the stamp is read from the database, so a credential change made
+# through any worker stops the reuse on every worker. Created lazily because
+# the lifetime comes from app config.
+_access_token_cache = None
+
+
+def _access_tokens() -> TTLCache:
+    global _access_token_cache
+    if _access_token_cache is None:
+        lifetime = current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES')
+        if isinstance(lifetime, timedelta):
+            lifetime = lifetime.total_seconds()
+        # False/None means tokens never expire; still re-sign hourly
+        _access_token_cache = TTLCache(ttl=(lifetime or 7200) / 2)
+    return _access_token_cache
+
+
+def _access_token_for(user: User, sid: str) -> str:
+    """Access token for login session `sid` with `user`'s current claims (reused while fresh)."""
+    claims = {
+        'username': user.username,
+        'role': user.role,
+        'full_name': user.full_name,
+        'nickname': user.nickname,
+        'display_name': user.display_name,
+    }
+    # Changes on login, logout-all, password change and PIN change
+    stamp = (sid, claims, user.token_version or 0, user.password_hash, user.pin_hash)
+    key = str(user.id)
+
+    def sign():
+        token_claims = dict(claims, ver=user.token_version or 0, sid=sid)
+        return stamp, create_access_token(identity=key, additional_claims=token_claims)
+
+    cache = _access_tokens()
+    cached_stamp, token = cache.get_or_load(key, sign)
+    if cached_stamp != stamp:
+        # Another session, or role, name or credentials changed since it was signed
+        cache.invalidate(key)
+        cached_stamp, token = cache.get_or_load(key, sign)
+    return token
+
+
+def _password_classes(password: str) -> int:
+    """Bitmask of the _PW_HAS_* classes present in `password`."""
+    # One set() pass over the string, then C-level set checks per class
+    chars = set(password)
+    flags = 0
+    if not chars.isdisjoint(_PW_UPPER):
+        flags |= _PW_HAS_UPPER
+    if not chars.isdisjoint(_PW_DIGIT):
+        flags |= _PW_HAS_DIGIT
+    if not chars <= _PW_ALNUM:
+        flags |= _PW_HAS_SPECIAL
+    return flags
+
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """
@@ -70,18 +152,13 @@ def login():
         user = User.query.filter_by(username=username).first()
         
         if not user:
+            # Spend the same hashing time as a wrong password would
+            reject_secret(password or pin)
             return jsonify({
                 'success': False,
                 'message': 'Invalid username or password'
             }), 401
         
-        # Check if user is active
-        if not user.is_active:
-            return jsonify({
-                'success': False,
-                'message': 'Account is deactivated. Please contact supervisor.'
-            }), 403
-        
         # Authenticate
         authenticated = False
         auth_method = None
@@ -93,36 +170,48 @@ def login():
             authenticated = user.check_pin(pin)
             auth_method = 'pin'
         
+        # Same message as an unknown username, so the two can't be told apart
         if not authenticated:
             return jsonify({
                 'success': False,
-                'message': 'Invalid credentials'
+                'message': 'Invalid username or password'
             }), 401
         
+        # Only reveal the account state once the credentials check out
+        if not user.is_active:
+            return jsonify({
+                'success': False,
+                'message': 'Account is deactivated. Please contact supervisor.'
+            }), 403
+        
         # Validate role if specified
-        if requested_role and user.role != requested_role:
+        if requested_role and not hmac.compare_digest(
+            str(user.role or '').encode(), str(requested_role).encode()
+        ):
             return jsonify({
                 'success': False,
                 'message': f'You do not have {requested_role} privileges'
             }), 403
         
-        # Update login status
-        user.is_logged_in = True
-        user.last_login = datetime.now()
-        db.session.commit()
+        # Update login status. A repeat login within _LAST_LOGIN_RESOLUTION
+        # keeps the stored last_login, so it skips the UPDATE round trip
+        # (a rehashed password still gets committed).
+        now = datetime.now()
+        if (not user.is_logged_in or not user.last_login
+                or now - user.last_login >= _LAST_LOGIN_RESOLUTION):
+            user.is_logged_in = True
+            user.last_login = now
+        if db.session.dirty:
+            db.session.commit()
         
-        # Create tokens
-        access_token = create_access_token(
+        # Create tokens; both carry the login session id so logout can
+        # revoke the pair with one blocklist entry
+        sid = uuid.uuid4().hex
+        access_token = _access_token_for(user, sid)
+        refresh_token = create_refresh_token(
             identity=str(user.id),
-            additional_claims={
-                'username': user.username,
-                'role': user.role,
-                'full_name': user.full_name,
-                'nickname': user.nickname,
-                'display_name': user.display_name,
-            }
+            additional_claims={'ver': user.token_version or 0, 'sid': sid},
         )
-        refresh_token = create_refresh_token(identity=str(user.id))
         
         return jsonify({
             'success': True,
@@ -146,18 +235,58 @@ def login():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Logout endpoint - Updates user login status"""
+    """Logout endpoint - Revokes this session's tokens and updates login status"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        user = db.session.get(User, user_id)
+        claims = get_jwt()
+        now = datetime.now()
+        
+        # Block the presented token until it expires, and its login session
+        # (the refresh token and any access token it was refreshed into)
+        # until the longest-lived refresh token could expire. Other devices
+        # keep their own sessions.
+        session_expires_at = now + (current_app.config.get('JWT_REFRESH_TOKEN_EXPIRES') or timedelta(days=30))
+        token_expires_at = datetime.fromtimestamp(claims['exp']) if 'exp' in claims else session_expires_at
+        revoked = [RevokedToken(jti=claims['jti'], expires_at=token_expires_at)]
+        if claims.get('sid'):
+            revoked.append(RevokedToken(jti=claims['sid'], expires_at=session_expires_at))
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        db.session.add_all(revoked)
+        if user:
+            user.is_logged_in = False
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Logout successful'
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Logout failed: {str(e)}'
+        }), 500
+
+
+@auth_bp.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    """Log out every device - Revokes all tokens handed out to this user so far"""
+    try:
+        user_id = int(get_jwt_identity())
+        user = db.session.get(User, user_id)
         
         if user:
             user.is_logged_in = False
+            # Every token carries the version it was signed for
+            user.token_version = (user.token_version or 0) + 1
             db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Logout successful'
+            'message': 'Logged out of all devices'
         }), 200
         
     except Exception as e:
@@ -173,8 +302,8 @@ def logout():
 def refresh():
     """Refresh access token"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        user = db.session.get(User, user_id)
         
         if not user:
             return jsonify({
@@ -188,16 +317,10 @@ def refresh():
                 'message': 'Account is deactivated'
             }), 403
         
-        access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims={
-                'username': user.username,
-                'role': user.role,
-                'full_name': user.full_name,
-                'nickname': user.nickname,
-                'display_name': user.display_name,
-            }
-        )
+        # Refresh tokens from before login sessions existed: their own jti
+        # stands in, so logout still revokes them
+        claims = get_jwt()
+        access_token = _access_token_for(user, claims.get('sid') or claims['jti'])
         
         return jsonify({
             'success': True,
@@ -218,8 +341,8 @@ def refresh():
 def get_current_user():
     """Get current authenticated user"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        user = db.session.get(User, user_id)
         
         if not user:
             return jsonify({
@@ -244,8 +367,8 @@ def get_current_user():
 def update_current_user():
     """Update current authenticated user profile (nickname/full name/email/etc)."""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        user = db.session.get(User, user_id)
 
         if not user:
             return jsonify({
@@ -341,8 +464,8 @@ def verify_token():
 def change_password():
     """Change user password"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        user = db.session.get(User, user_id)
         data = request.get_json()
         
         if not user:
@@ -393,8 +516,8 @@ def change_password():
 def set_pin():
     """Set or update user PIN"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        user = db.session.get(User, user_id)
         data = request.get_json()
         
         if not user:
@@ -481,7 +604,7 @@ def register():
         email = (data.get('email') or '').strip()
         if email:
             # Basic email format validation (kept intentionally simple)
-            if len(email) > 254 or not re.match(r'^[^@\s]+@[^@\s]+\.[^@\s]+$', email, re.IGNORECASE):
+            if len(email) > 254 or not _EMAIL_RE.match(email):
                 return jsonify({
                     'success': False,
                     'message': 'Invalid email address'
@@ -502,21 +625,13 @@ def register():
             }), 400
 
         # Validate password strength: uppercase, number, special character
-        if not re.search(r'[A-Z]', password):
-            return jsonify({
-                'success': False,
-                'message': 'Password must contain at least 1 uppercase letter'
-            }), 400
-        if not re.search(r'\d', password):
-            return jsonify({
-                'success': False,
-                'message': 'Password must contain at least 1 number'
-            }), 400
-        if not re.search(r'[^A-Za-z0-9]', password):
-            return jsonify({
-                'success': False,
-                'message': 'Password must contain at least 1 special character'
-            }), 400
+        classes = _password_classes(password)
+        for flag, message in _PW_RULES:
+            if not classes & flag:
+                return jsonify({
+                    'success': False,
+                    'message': message
+                }), 400
         
         # Check if username already exists
         existing_user = User.query.filter_by(username=username).first()
@@ -529,7 +644,7 @@ def register():
         # Validate phone number (optional): digits only, length 11-12
         phone = (data.get('phone') or '').strip()
         if phone:
-            if not re.fullmatch(r'\d{11,12}', phone):
+            if not _PHONE_RE.fullmatch(phone):
                 return jsonify({
                     'success': False,
                     'message': 'Invalid phone number'
@@ -575,6 +690,15 @@ def register():
         }), 500
 
 
+_PENDING_ACCOUNTS = (
+    select(
+        User.id, User.username, User.first_name, User.last_name,
+        User.email, User.phone, User.address, User.created_at,
+    )
+    .filter_by(is_active=False, role='cashier')
+)
+
+
 @auth_bp.route('/pending-accounts', methods=['GET'])
 @jwt_required()
 def get_pending_accounts():
@@ -587,22 +711,23 @@ def get_pending_accounts():
                 'message': 'Supervisor access required'
             }), 403
         
-        # Get all inactive users (pending approval)
-        pending_users = User.query.filter_by(is_active=False, role='cashier').all()
+        # Get all inactive users (pending approval); plain rows, since only
+        # these columns are read
+        pending_users = db.session.execute(_PENDING_ACCOUNTS).all()
         
         return jsonify({
             'success': True,
             'data': [{
-                'id': user.id,
-                'username': user.username,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'full_name': user.full_name,
-                'email': user.email,
-                'phone': user.phone,
-                'address': user.address,
-                'created_at': user.created_at.isoformat() if user.created_at else None
-            } for user in pending_users],
+                'id': row.id,
+                'username': row.username,
+                'first_name': row.first_name,
+                'last_name': row.last_name,
+                'full_name': f"{row.first_name} {row.last_name}",
+                'email': row.email,
+                'phone': row.phone,
+                'address': row.address,
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            } for row in pending_users],
             'count': len(pending_users)
         }), 200
         
@@ -625,7 +750,7 @@ def approve_account(user_id):
                 'message': 'Supervisor access required'
             }), 403
         
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({
                 'success': False,
@@ -667,7 +792,7 @@ def reject_account(user_id):
                 'message': 'Supervisor access required'
             }), 403
         
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({
                 'success': False,
@@ -14,10 +14,10 @@ categories_bp = Blueprint('categories', __name__)
 def get_categories():
     """Get all categories"""
     try:
-        categories = Category.query.filter_by(is_active=True).all()
+        rows = Category.with_product_counts().filter(Category.is_active.is_(True)).all()
         return jsonify({
             'success': True,
-            'data': [c.to_dict() for c in categories]
+            'data': [c.to_dict(product_count=count) for c, count in rows]
         }), 200
     except Exception as e:
         return jsonify({
@@ -31,7 +31,7 @@ def get_categories():
 def get_category(category_id):
     """Get specific category"""
     try:
-        category = Category.query.get(category_id)
+        category = db.session.get(Category, category_id)
         if not category:
             return jsonify({
                 'success': False,
@@ -104,7 +104,7 @@ def update_category(category_id):
                 'message': 'Supervisor access required'
             }), 403
         
-        category = Category.query.get(category_id)
+        category = db.session.get(Category, category_id)
         if not category:
             return jsonify({
                 'success': False,
@@ -3,11 +3,37 @@ Customers routes
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
+from sqlalchemy import func, literal_column
 from extensions import db
 from models.customer import Customer
+from utils.json_provider import native_json_response
 
 customers_bp = Blueprint('customers', __name__)
 
+# name/phone/email as one string. On Postgres the trigram GIN index
+# idx_customers_search_trgm (database/optimize_db.py) is built on exactly
+# this expression, so a substring ILIKE on it is an index probe. Literals
+# are inlined rather than bound so the planner can match the index.
+_SEARCH_TEXT = (
+    Customer.name
+    + literal_column("' '")
+    + func.coalesce(Customer.phone, literal_column("''"))
+    + literal_column("' '")
+    + func.coalesce(Customer.email, literal_column("''"))
+)
+
+
+def _search_filter(search):
+    pattern = f'%{search}%'
+    if db.engine.dialect.name == 'postgresql':
+        return _SEARCH_TEXT.ilike(pattern)
+    # SQLite/MySQL: no trigram index to use, keep the per-column match
+    return (
+        Customer.name.ilike(pattern)
+        | Customer.phone.ilike(pattern)
+        | Customer.email.ilike(pattern)
+    )
+
 
 @customers_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -19,17 +45,13 @@ def get_customers():
         # Search
         search = request.args.get('search')
         if search:
-            query = query.filter(
-                (Customer.name.ilike(f'%{search}%')) |
-                (Customer.phone.ilike(f'%{search}%')) |
-                (Customer.email.ilike(f'%{search}%'))
-            )
+            query = query.filter(_search_filter(search))
         
         customers = query.all()
-        return jsonify({
+        return native_json_response({
             'success': True,
-            'data': [c.to_dict() for c in customers]
-        }), 200
+            'data': [c.to_row() for c in customers]
+        })
     except Exception as e:
         return jsonify({
             'success': False,
@@ -42,7 +64,7 @@ def get_customers():
 def get_customer(customer_id):
     """Get specific customer"""
     try:
-        customer = Customer.query.get(customer_id)
+        customer = db.session.get(Customer, customer_id)
         if not customer:
             return jsonify({
                 'success': False,
@@ -101,7 +123,7 @@ def create_customer():
 def update_customer(customer_id):
     """Update customer"""
     try:
-        customer = Customer.query.get(customer_id)
+        customer = db.session.get(Customer, customer_id)
         if not customer:
             return jsonify({
                 'success': False,
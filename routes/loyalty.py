@@ -18,6 +18,7 @@ from flask_jwt_extended import (
     create_access_token,
 )
 from sqlalchemy import or_, func
+from sqlalchemy.orm import contains_eager, joinedload, raiseload
 from extensions import db
 from models import Customer, User
 from models.loyalty import LoyaltyMember, LoyaltyTier, LoyaltyTransaction, LoyaltySetting
@@ -34,12 +35,15 @@ from utils.otp_sms import (
     twilio_verify_send_code,
 )
 from utils.otp_email import send_otp_email
+from utils.settings_cache import get_loyalty_setting, loyalty_settings_cache
 
 loyalty_bp = Blueprint('loyalty', __name__)
 
 
 _STAFF_ROLES = {'admin', 'superadmin', 'supervisor', 'cashier'}
 _MEMBER_ROLE = 'loyalty_member'
+# Digits only, 11-12 long (local 09xx... or 63xx... format)
+_PHONE_RE = re.compile(r'\d{11,12}')
 
 
 # =============================================================================
@@ -200,14 +204,6 @@ def _require_roles(roles):
 # HELPER FUNCTIONS
 # =============================================================================
 
-def get_loyalty_setting(key, default=None):
-    """Get a loyalty setting value by key"""
-    setting = LoyaltySetting.query.filter_by(setting_key=key).first()
-    if setting:
-        return setting.get_value()
-    return default
-
-
 def log_activity(user_id, action, entity_type, entity_id, details=None):
     """Log activity for audit trail"""
     from models.user import ActivityLog
@@ -291,6 +287,13 @@ def get_members():
             query = query.filter(LoyaltyMember.card_status == status)
         
         # Paginate
+        # The Customer join above doubles as the eager load for to_dict()
+        query = query.options(
+            contains_eager(LoyaltyMember.customer),
+            joinedload(LoyaltyMember.tier),
+            raiseload('*'),
+        )
+        
         pagination = query.order_by(LoyaltyMember.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -340,6 +343,12 @@ def get_archived_members():
                 )
             )
 
+        query = query.options(
+            contains_eager(LoyaltyMember.customer),
+            joinedload(LoyaltyMember.tier),
+            raiseload('*'),
+        )
+
         # MariaDB/MySQL don't support `NULLS LAST`. Use an `IS NULL` sort key.
         pagination = query.order_by(
             LoyaltyMember.archived_at.is_(None).asc(),
@@ -372,7 +381,7 @@ def archive_member(member_id: int):
             return denied
 
         current_user_id = get_jwt_identity()
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
 
@@ -410,7 +419,7 @@ def restore_member(member_id: int):
             return denied
 
         current_user_id = get_jwt_identity()
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
 
@@ -447,7 +456,7 @@ def get_member(member_id):
         if denied:
             return denied
 
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
         
@@ -551,7 +560,7 @@ def register_member():
         customer_id = data.get('customer_id')
         
         if customer_id:
-            customer = Customer.query.get(customer_id)
+            customer = db.session.get(Customer, customer_id)
             if not customer:
                 return jsonify({'success': False, 'message': 'Customer not found'}), 404
             
@@ -574,7 +583,7 @@ def register_member():
 
             # Validate phone number (optional): digits only, length 11-12
             if phone:
-                if not re.fullmatch(r'\d{11,12}', phone):
+                if not _PHONE_RE.fullmatch(phone):
                     return jsonify({'success': False, 'message': 'Invalid phone number'}), 400
 
             # If phone/email already exist as a Customer, reuse that customer.
@@ -583,21 +592,23 @@ def register_member():
             existing_by_phone = None
             existing_by_email = None
 
-            if phone:
-                phone_variants = _phone_variants_for_lookup(phone)
-                if phone_variants:
-                    existing_by_phone = (
-                        Customer.query
-                        .filter(Customer.phone.in_(phone_variants))
-                        .first()
-                    )
-
+            # Look up by phone and email in one query. The phone variants
+            # (09..., 639..., +639...) may match more than one customer, so
+            # read every row and keep the first match of each kind.
+            phone_variants = _phone_variants_for_lookup(phone) if phone else []
+            email_lower = email.lower()
+            lookups = []
+            if phone_variants:
+                lookups.append(Customer.phone.in_(phone_variants))
             if email:
-                existing_by_email = (
-                    Customer.query
-                    .filter(func.lower(Customer.email) == email.lower())
-                    .first()
-                )
+                lookups.append(Customer.email_lower == email_lower)
+
+            if lookups:
+                for match in Customer.query.filter(or_(*lookups)).order_by(Customer.id).all():
+                    if existing_by_phone is None and match.phone in phone_variants:
+                        existing_by_phone = match
+                    if existing_by_email is None and email and match.email_lower == email_lower:
+                        existing_by_email = match
 
             if existing_by_phone and existing_by_email and existing_by_phone.id != existing_by_email.id:
                 return jsonify({
@@ -639,13 +650,7 @@ def register_member():
                 db.session.flush()  # Get the customer ID
         
         # Generate unique member number and barcode
-        member_number = LoyaltyMember.generate_member_number()
-        while LoyaltyMember.query.filter_by(member_number=member_number).first():
-            member_number = LoyaltyMember.generate_member_number()
-        
-        card_barcode = LoyaltyMember.generate_barcode()
-        while LoyaltyMember.query.filter_by(card_barcode=card_barcode).first():
-            card_barcode = LoyaltyMember.generate_barcode()
+        [(member_number, card_barcode)] = LoyaltyMember.generate_identifiers()
         
         # Calculate expiry date (1 year from now)
         expiry_date = datetime.now() + timedelta(days=365)
@@ -699,7 +704,7 @@ def update_member(member_id):
     """Update member information"""
     try:
         current_user_id = get_jwt_identity()
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
@@ -721,7 +726,9 @@ def update_member(member_id):
                     return jsonify({'success': False, 'message': 'Phone number already registered'}), 400
 
             if email is not None and email != customer.email and email != '':
-                existing_email = Customer.query.filter(Customer.email == email, Customer.id != customer.id).first()
+                existing_email = Customer.query.filter(
+                    Customer.email_lower == email.strip().lower(), Customer.id != customer.id
+                ).first()
                 if existing_email:
                     return jsonify({'success': False, 'message': 'Email already registered'}), 400
 
@@ -790,7 +797,7 @@ def delete_member(member_id):
             return denied
 
         current_user_id = get_jwt_identity()
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
 
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
@@ -821,6 +828,10 @@ def delete_member(member_id):
             Transaction.query.filter(Transaction.customer_id == customer_id).update(
                 {'customer_id': None}, synchronize_session=False
             )
+            # Bulk update skips the per-row count events
+            Customer.query.filter(Customer.id == customer_id).update(
+                {'transaction_count': 0}, synchronize_session=False
+            )
         except Exception:
             # If transactions table/model is unavailable for some reason, proceed
             # with loyalty deletion only; customer delete may fail and will be
@@ -863,7 +874,7 @@ def renew_membership(member_id):
     """Renew membership validity for 1 year."""
     try:
         current_user_id = get_jwt_identity()
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
 
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
@@ -901,7 +912,7 @@ def issue_card(member_id):
     """Mark physical card as issued"""
     try:
         current_user_id = get_jwt_identity()
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
@@ -935,7 +946,7 @@ def issue_card(member_id):
 def get_card_data(member_id):
     """Get data needed for generating physical card"""
     try:
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
@@ -979,14 +990,14 @@ def add_points(member_id):
         current_user_id = get_jwt_identity()
         
         # Verify user is supervisor
-        user = User.query.get(current_user_id)
+        user = db.session.get(User, current_user_id)
         if not user or user.role != 'supervisor':
             return jsonify({
                 'success': False,
                 'message': 'Only supervisors can adjust points manually'
             }), 403
         
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
         
@@ -1061,21 +1072,22 @@ def get_member_transactions(member_id):
         if denied:
             return denied
 
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
         
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        pagination = LoyaltyTransaction.query.filter_by(member_id=member_id)\
+        pagination = LoyaltyTransaction.list_query()\
+            .filter(LoyaltyTransaction.member_id == member_id)\
             .order_by(LoyaltyTransaction.created_at.desc())\
             .paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
             'success': True,
             'data': {
-                'transactions': [t.to_dict() for t in pagination.items],
+                'transactions': LoyaltyTransaction.list_dicts(pagination.items),
                 'total': pagination.total,
                 'pages': pagination.pages,
                 'current_page': page
@@ -1096,7 +1108,7 @@ def redeem_points(member_id):
             'message': 'Points system has been removed'
         }), 410
         current_user_id = get_jwt_identity()
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
@@ -1171,7 +1183,7 @@ def redeem_product_for_member(member_id: int):
 
         staff_user_id = get_jwt_identity()
 
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
 
@@ -1192,7 +1204,7 @@ def redeem_product_for_member(member_id: int):
         if quantity <= 0:
             return jsonify({'success': False, 'message': 'Quantity must be at least 1'}), 400
 
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         if not product or not product.is_active:
             return jsonify({'success': False, 'message': 'Product not found'}), 404
 
@@ -1269,11 +1281,11 @@ def get_tiers():
         if denied:
             return denied
 
-        tiers = LoyaltyTier.query.order_by(LoyaltyTier.min_points).all()
+        rows = LoyaltyTier.with_member_counts().order_by(LoyaltyTier.min_points).all()
         
         return jsonify({
             'success': True,
-            'data': [t.to_dict() for t in tiers]
+            'data': [t.to_dict(member_count=count) for t, count in rows]
         }), 200
         
     except Exception as e:
@@ -1287,14 +1299,14 @@ def update_tier(tier_id):
     try:
         current_user_id = get_jwt_identity()
         
-        user = User.query.get(current_user_id)
+        user = db.session.get(User, current_user_id)
         if not user or user.role != 'supervisor':
             return jsonify({
                 'success': False,
                 'message': 'Only supervisors can update tier settings'
             }), 403
         
-        tier = LoyaltyTier.query.get(tier_id)
+        tier = db.session.get(LoyaltyTier, tier_id)
         if not tier:
             return jsonify({'success': False, 'message': 'Tier not found'}), 404
         
@@ -1395,7 +1407,7 @@ def update_loyalty_settings():
 
         current_user_id = get_jwt_identity()
         
-        user = User.query.get(current_user_id)
+        user = db.session.get(User, current_user_id)
         if not user or user.role != 'supervisor':
             return jsonify({
                 'success': False,
@@ -1433,6 +1445,7 @@ def update_loyalty_settings():
                 updated.append(key)
         
         db.session.commit()
+        loyalty_settings_cache.invalidate()
         
         log_activity(
             current_user_id,
@@ -1503,7 +1516,7 @@ def loyalty_member_app_login():
                 }), 400
 
             # Strict phone format: digits only 11-12 (matches cashier registration rules)
-            if not re.fullmatch(r'\d{11,12}', phone):
+            if not _PHONE_RE.fullmatch(phone):
                 return jsonify({'success': False, 'message': 'Invalid phone number'}), 400
 
             phone_variants = _phone_variants_for_lookup(phone)
@@ -1683,7 +1696,7 @@ def loyalty_member_app_request_otp():
                 'message': 'member_number and phone are required'
             }), 400
 
-        if not re.fullmatch(r'\d{11,12}', phone):
+        if not _PHONE_RE.fullmatch(phone):
             return jsonify({'success': False, 'message': 'Invalid phone number'}), 400
 
         phone_variants = _phone_variants_for_lookup(phone)
@@ -1928,7 +1941,7 @@ def loyalty_member_app_me():
         except Exception:
             return jsonify({'success': False, 'message': 'Invalid token identity'}), 401
 
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
 
@@ -1968,7 +1981,8 @@ def loyalty_member_app_transactions():
         per_page = request.args.get('per_page', 20, type=int)
 
         pagination = (
-            LoyaltyTransaction.query.filter_by(member_id=member_id)
+            LoyaltyTransaction.list_query()
+            .filter(LoyaltyTransaction.member_id == member_id)
             .order_by(LoyaltyTransaction.created_at.desc())
             .paginate(page=page, per_page=per_page, error_out=False)
         )
@@ -1976,7 +1990,7 @@ def loyalty_member_app_transactions():
         return jsonify({
             'success': True,
             'data': {
-                'transactions': [t.to_dict() for t in pagination.items],
+                'transactions': LoyaltyTransaction.list_dicts(pagination.items),
                 'total': pagination.total,
                 'pages': pagination.pages,
                 'current_page': page,
@@ -2039,7 +2053,7 @@ def loyalty_member_app_redeem_reward():
         except Exception:
             return jsonify({'success': False, 'message': 'Invalid token identity'}), 401
 
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
 
@@ -2060,7 +2074,7 @@ def loyalty_member_app_redeem_reward():
         if quantity <= 0:
             return jsonify({'success': False, 'message': 'Quantity must be at least 1'}), 400
 
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         if not product or not product.is_active:
             return jsonify({'success': False, 'message': 'Product not found'}), 404
 
@@ -2269,7 +2283,7 @@ def earn_points_on_purchase():
                 'message': 'Member ID and positive amount required'
             }), 400
         
-        member = LoyaltyMember.query.get(member_id)
+        member = db.session.get(LoyaltyMember, member_id)
         if not member:
             return jsonify({'success': False, 'message': 'Member not found'}), 404
         
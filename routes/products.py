@@ -6,10 +6,12 @@ import time
 from flask import Blueprint, request, jsonify
 from flask import current_app
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from sqlalchemy.orm import joinedload, raiseload
 from werkzeug.utils import secure_filename
 from extensions import db
 from models.product import Product, Category
 from utils.activity_logger import log_activity
+from utils.json_provider import native_json_response
 
 products_bp = Blueprint('products', __name__)
 
@@ -53,10 +55,14 @@ def get_products():
         # Get total count before pagination
         total_count = query.count()
         
-        # Apply pagination
-        products = query.offset((page - 1) * per_page).limit(per_page).all()
+        # Apply pagination; to_dict() reads category.name, so load it in the
+        # same query and refuse any other lazy load
+        products = (
+            query.options(joinedload(Product.category), raiseload('*'))
+            .offset((page - 1) * per_page).limit(per_page).all()
+        )
         
-        return jsonify({
+        return native_json_response({
             'success': True,
             'data': [p.to_dict() for p in products],
             'pagination': {
@@ -67,7 +73,7 @@ def get_products():
                 'has_next': page * per_page < total_count,
                 'has_prev': page > 1
             }
-        }), 200
+        })
     except Exception as e:
         return jsonify({
             'success': False,
@@ -80,7 +86,7 @@ def get_products():
 def get_product(product_id):
     """Get specific product"""
     try:
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         if not product:
             return jsonify({
                 'success': False,
@@ -237,7 +243,7 @@ def update_product(product_id):
                 'message': 'Supervisor access required'
             }), 403
         
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         if not product:
             return jsonify({
                 'success': False,
@@ -297,7 +303,7 @@ def update_stock(product_id):
                 'message': 'Supervisor access required'
             }), 403
 
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         if not product:
             return jsonify({
                 'success': False,
@@ -342,7 +348,7 @@ def upload_product_image(product_id):
                 'message': 'Supervisor access required'
             }), 403
 
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id)
         if not product:
             return jsonify({
                 'success': False,
@@ -76,7 +76,7 @@ def create_promotion():
 def update_promotion(promo_id):
     """Updates an existing promotion."""
     try:
-        promo = Promotion.query.get_or_404(promo_id)
+        promo = db.get_or_404(Promotion, promo_id)
         data = request.get_json()
 
         promo.title = data.get('title', promo.title)
@@ -103,7 +103,7 @@ def update_promotion(promo_id):
 def delete_promotion(promo_id):
     """Deletes a promotion."""
     try:
-        promo = Promotion.query.get_or_404(promo_id)
+        promo = db.get_or_404(Promotion, promo_id)
         db.session.delete(promo)
         db.session.commit()
         return jsonify({
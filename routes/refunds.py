@@ -176,7 +176,7 @@ def _restore_redeemed_reward_points_for_transaction(
         if unit_price > 0 or line_total > 0:
             continue
 
-        product = Product.query.get(item.product_id)
+        product = db.session.get(Product, item.product_id)
         if not product:
             continue
 
@@ -236,7 +236,7 @@ def _process_refund(
 
     # Restore stock
     for item in transaction.items:
-        product = Product.query.get(item.product_id)
+        product = db.session.get(Product, item.product_id)
         if product:
             product.stock_quantity += int(item.quantity or 0)
 
@@ -266,7 +266,7 @@ def request_or_refund_transaction(transaction_id: int):
         if user_id is None:
             return jsonify({'success': False, 'message': 'Invalid user identity'}), 401
 
-        transaction = Transaction.query.get(transaction_id)
+        transaction = db.session.get(Transaction, transaction_id)
         if not transaction:
             return jsonify({'success': False, 'message': 'Transaction not found'}), 404
 
@@ -432,14 +432,14 @@ def approve_refund_request(request_id: int):
         if user_id is None:
             return jsonify({'success': False, 'message': 'Invalid user identity'}), 401
 
-        rr = RefundRequest.query.get(request_id)
+        rr = db.session.get(RefundRequest, request_id)
         if not rr:
             return jsonify({'success': False, 'message': 'Refund request not found'}), 404
 
         if rr.status != 'pending':
             return jsonify({'success': False, 'message': 'Refund request is not pending'}), 400
 
-        transaction = Transaction.query.get(rr.transaction_id)
+        transaction = db.session.get(Transaction, rr.transaction_id)
         if not transaction:
             return jsonify({'success': False, 'message': 'Transaction not found'}), 404
 
@@ -499,7 +499,7 @@ def reject_refund_request(request_id: int):
         if user_id is None:
             return jsonify({'success': False, 'message': 'Invalid user identity'}), 401
 
-        rr = RefundRequest.query.get(request_id)
+        rr = db.session.get(RefundRequest, request_id)
         if not rr:
             return jsonify({'success': False, 'message': 'Refund request not found'}), 404
 
@@ -554,7 +554,7 @@ def get_daily_refund_stats():
 
         refunded_products = 0
         for rr in refunded_requests:
-            txn = Transaction.query.get(rr.transaction_id)
+            txn = db.session.get(Transaction, rr.transaction_id)
             if txn:
                 refunded_products += int(txn.item_count or 0)
 
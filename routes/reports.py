@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from sqlalchemy import func, desc
+from sqlalchemy.orm import defer, lazyload
 from extensions import db
 from models.transaction import Transaction, TransactionItem
 from models.product import Product, Category
@@ -14,6 +15,18 @@ from utils.rbac import require_supervisor
 reports_bp = Blueprint('reports', __name__)
 
 
+def _transactions_query(with_notes=False):
+    """Transaction query for the reports; item_count is stored, so items aren't loaded.
+    
+    The free-text notes column is only fetched for reports that list the
+    transactions themselves (`with_notes=True`).
+    """
+    query = Transaction.query.options(lazyload(Transaction.items))
+    if not with_notes:
+        query = query.options(defer(Transaction.notes))
+    return query
+
+
 @reports_bp.route('/daily', methods=['GET'])
 @jwt_required()
 @require_supervisor
@@ -28,7 +41,7 @@ def get_daily_report():
             report_date = datetime.now().date()
         
         # Get transactions for the day
-        transactions = Transaction.query.filter(
+        transactions = _transactions_query(with_notes=True).filter(
             func.date(Transaction.created_at) == report_date,
             Transaction.status == 'completed'
         ).all()
@@ -68,7 +81,7 @@ def get_daily_report():
         
         # Calculate trend percentage (compare with previous day)
         previous_date = report_date - timedelta(days=1)
-        previous_transactions = Transaction.query.filter(
+        previous_transactions = _transactions_query().filter(
             func.date(Transaction.created_at) == previous_date,
             Transaction.status == 'completed'
         ).all()
@@ -129,7 +142,7 @@ def get_weekly_report():
         start_date = end_date - timedelta(days=6)
         
         # Get transactions for the week
-        transactions = Transaction.query.filter(
+        transactions = _transactions_query().filter(
             func.date(Transaction.created_at) >= start_date,
             func.date(Transaction.created_at) <= end_date,
             Transaction.status == 'completed'
@@ -155,7 +168,7 @@ def get_weekly_report():
         # Calculate trend percentage (compare with previous week)
         previous_end_date = start_date - timedelta(days=1)
         previous_start_date = previous_end_date - timedelta(days=6)
-        previous_transactions = Transaction.query.filter(
+        previous_transactions = _transactions_query().filter(
             func.date(Transaction.created_at) >= previous_start_date,
             func.date(Transaction.created_at) <= previous_end_date,
             Transaction.status == 'completed'
@@ -199,7 +212,7 @@ def get_monthly_report():
         month = request.args.get('month', datetime.now().month, type=int)
         
         # Get transactions for the month
-        transactions = Transaction.query.filter(
+        transactions = _transactions_query().filter(
             func.year(Transaction.created_at) == year,
             func.month(Transaction.created_at) == month,
             Transaction.status == 'completed'
@@ -234,7 +247,7 @@ def get_monthly_report():
             previous_year = year
             previous_month = month - 1
         
-        previous_transactions = Transaction.query.filter(
+        previous_transactions = _transactions_query().filter(
             func.year(Transaction.created_at) == previous_year,
             func.month(Transaction.created_at) == previous_month,
             Transaction.status == 'completed'
@@ -277,7 +290,7 @@ def get_yearly_report():
         year = request.args.get('year', datetime.now().year, type=int)
         
         # Get transactions for the year
-        transactions = Transaction.query.filter(
+        transactions = _transactions_query().filter(
             func.year(Transaction.created_at) == year,
             Transaction.status == 'completed'
         ).all()
@@ -302,7 +315,7 @@ def get_yearly_report():
         
         # Calculate trend percentage (compare with previous year)
         previous_year = year - 1
-        previous_transactions = Transaction.query.filter(
+        previous_transactions = _transactions_query().filter(
             func.year(Transaction.created_at) == previous_year,
             Transaction.status == 'completed'
         ).all()
@@ -6,6 +6,7 @@ from flask_jwt_extended import jwt_required, get_jwt
 from extensions import db
 
 from models.setting import Setting
+from utils.settings_cache import app_settings_cache, cache_value, copy_value
 
 settings_bp = Blueprint('settings', __name__)
 
@@ -92,17 +93,22 @@ def _ensure_defaults():
 
 def get_setting_value(key, default=None):
     """Get a typed setting value from DB with a default fallback."""
-    _ensure_defaults()
-    row = Setting.query.filter_by(setting_key=key).first()
-    if row is None:
+    values = app_settings_cache.get_or_load('all', _load_settings)
+    if key not in values:
         return DEFAULT_SETTINGS.get(key, (default, 'string', None))[0]
-    return row.get_value()
+    return copy_value(values[key])
 
 
-def _all_settings_dict():
+def _load_settings():
     _ensure_defaults()
     rows = Setting.query.all()
-    return {r.setting_key: r.get_value() for r in rows}
+    return {r.setting_key: cache_value(r) for r in rows}
+
+
+def _all_settings_dict():
+    # Copy so callers can't modify the cached dict or its JSON values
+    values = app_settings_cache.get_or_load('all', _load_settings)
+    return {key: copy_value(value) for key, value in values.items()}
 
 
 @settings_bp.route('/', methods=['GET'])
@@ -204,6 +210,7 @@ def update_settings():
             updated[key] = row.get_value()
 
         db.session.commit()
+        app_settings_cache.invalidate()
         
         return jsonify({
             'success': True,
@@ -5,12 +5,15 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from extensions import db
-from sqlalchemy import or_
-from models.loyalty import LoyaltyMember, LoyaltyTransaction, LoyaltyTier, LoyaltySetting
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import defer, joinedload, raiseload, selectinload
+from models.loyalty import LoyaltyMember, LoyaltyTransaction, LoyaltyTier
 from models.transaction import Transaction, TransactionItem
 from models.product import Product
 from models.customer import Customer
+from utils.settings_cache import get_loyalty_setting
 from utils.activity_logger import log_activity
+from utils.json_provider import native_json_response
 
 transactions_bp = Blueprint('transactions', __name__)
 
@@ -96,18 +99,26 @@ def get_transactions():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
+        # Everything to_dict() touches is loaded up front; any other lazy
+        # load raises instead of quietly running one query per row.
+        query = query.options(
+            selectinload(Transaction.items),
+            joinedload(Transaction.customer),
+            joinedload(Transaction.cashier),
+            raiseload('*'),
+        )
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         
-        return jsonify({
+        return native_json_response({
             'success': True,
-            'data': [t.to_dict() for t in pagination.items],
+            'data': [t.to_row() for t in pagination.items],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
                 'total': pagination.total,
                 'pages': pagination.pages
             }
-        }), 200
+        })
     except Exception as e:
         return jsonify({
             'success': False,
@@ -120,7 +131,8 @@ def get_transactions():
 def get_transaction(transaction_id):
     """Get specific transaction"""
     try:
-        transaction = Transaction.query.get(transaction_id)
+        # One row's items: a join is a single round-trip with no fan-out to speak of
+        transaction = db.session.get(Transaction, transaction_id, options=[joinedload(Transaction.items)])
         if not transaction:
             return jsonify({
                 'success': False,
@@ -155,7 +167,7 @@ def get_transaction(transaction_id):
 @transactions_bp.route('/by-code/<string:transaction_code>', methods=['GET'])
 @jwt_required()
 def get_transaction_by_code(transaction_code):
-    """Get specific transaction by its transaction_id code (e.g., TXN-20250101123000)."""
+    """Get specific transaction by its transaction_id code (e.g., TXN-20250101123000-1A2B3C)."""
     try:
         transaction = Transaction.query.filter_by(
             transaction_id=transaction_code,
@@ -209,34 +221,26 @@ def create_transaction():
                 'message': 'Transaction must have at least one item'
             }), 400
         
-        # Generate transaction ID
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        transaction_id = f"TXN-{timestamp}"
-        
-        # Create transaction
-        transaction = Transaction(
-            transaction_id=transaction_id,
-            user_id=user_id,
-            customer_id=data.get('customer_id'),
-            subtotal=data['subtotal'],
-            discount_amount=data.get('discount_amount', 0),
-            tax_amount=data.get('tax_amount', 0),
-            total_amount=data['total_amount'],
-            payment_method=data['payment_method'],
-            amount_received=data['amount_received'],
-            change_amount=data.get('change_amount', 0),
-            voucher_code=data.get('voucher_code'),
-            voucher_discount=data.get('voucher_discount', 0),
-            notes=data.get('notes'),
-            status='completed'
-        )
-        
-        db.session.add(transaction)
-        db.session.flush()  # Get transaction ID
-        
-        # Add transaction items and update stock
+        # Load every product in the cart with one query
+        product_ids = set()
         for item in items:
-            product = Product.query.get(item['product_id'])
+            try:
+                product_ids.add(int(item['product_id']))
+            except (TypeError, ValueError):
+                pass
+        products = {
+            p.id: p
+            for p in Product.query.options(defer(Product.description)).filter(Product.id.in_(product_ids))
+        } if product_ids else {}
+
+        # Validate items and update stock
+        item_rows = []
+        item_count = 0
+        for item in items:
+            try:
+                product = products.get(int(item['product_id']))
+            except (TypeError, ValueError):
+                product = None
             if not product:
                 db.session.rollback()
                 return jsonify({
@@ -255,23 +259,48 @@ def create_transaction():
                         'message': f'Insufficient stock for {product.name}'
                     }), 400
             
-            # Create transaction item
-            trans_item = TransactionItem(
-                transaction_id=transaction.id,
-                product_id=product.id,
-                product_name=product.name,
-                product_sku=product.sku,
-                unit_price=item['unit_price'],
-                quantity=item['quantity'],
-                discount_percent=item.get('discount_percent', 0),
-                subtotal=item['subtotal']
-            )
-            db.session.add(trans_item)
+            # Transaction item row; transaction_id is filled in after the flush
+            item_rows.append({
+                'product_id': product.id,
+                'product_name': product.name,
+                'product_sku': product.sku,
+                'unit_price': item['unit_price'],
+                'quantity': item['quantity'],
+                'discount_percent': item.get('discount_percent', 0),
+                'subtotal': item['subtotal'],
+            })
+
+            item_count += item['quantity']
 
             # Update stock (skip for redeemed reward items)
             if not skip_stock:
                 product.stock_quantity -= item['quantity']
         
+        # Create transaction (transaction_id defaults to a fresh receipt code)
+        transaction = Transaction(
+            user_id=user_id,
+            customer_id=data.get('customer_id'),
+            subtotal=data['subtotal'],
+            discount_amount=data.get('discount_amount', 0),
+            tax_amount=data.get('tax_amount', 0),
+            total_amount=data['total_amount'],
+            payment_method=data['payment_method'],
+            amount_received=data['amount_received'],
+            change_amount=data.get('change_amount', 0),
+            voucher_code=data.get('voucher_code'),
+            voucher_discount=data.get('voucher_discount', 0),
+            notes=data.get('notes'),
+            item_count=item_count,
+            status='completed'
+        )
+        
+        db.session.add(transaction)
+        db.session.flush()  # Get transaction ID
+        for row in item_rows:
+            row['transaction_id'] = transaction.id
+        
+        # All items in one multi-row INSERT rather than one INSERT per item
+        db.session.execute(insert(TransactionItem), item_rows)
         db.session.commit()
 
         # Loyalty: award points to member and auto-upgrade tier
@@ -280,9 +309,8 @@ def create_transaction():
                 member = LoyaltyMember.query.filter_by(customer_id=transaction.customer_id).first()
                 if member:
                     # Determine pesos-per-point from settings (default 10)
-                    setting = LoyaltySetting.query.filter_by(setting_key='pesos_per_point').first()
                     try:
-                        pesos_per_point = int(float(setting.get_value())) if setting else 10
+                        pesos_per_point = int(float(get_loyalty_setting('pesos_per_point', 10)))
                     except Exception:
                         pesos_per_point = 10
 
@@ -363,7 +391,7 @@ def void_transaction(transaction_id):
                 'message': 'Supervisor access required'
             }), 403
         
-        transaction = Transaction.query.get(transaction_id)
+        transaction = db.session.get(Transaction, transaction_id)
         if not transaction:
             return jsonify({
                 'success': False,
@@ -378,7 +406,7 @@ def void_transaction(transaction_id):
         
         # Restore stock
         for item in transaction.items:
-            product = Product.query.get(item.product_id)
+            product = db.session.get(Product, item.product_id)
             if product:
                 product.stock_quantity += item.quantity
         
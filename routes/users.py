@@ -39,7 +39,7 @@ def get_users():
 def get_user(user_id):
     """Get specific user"""
     try:
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({
                 'success': False,
@@ -123,7 +123,7 @@ def create_user():
 def update_user(user_id):
     """Update user"""
     try:
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({
                 'success': False,
@@ -181,7 +181,7 @@ def update_user(user_id):
 def delete_user(user_id):
     """Delete (deactivate) user"""
     try:
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify({
                 'success': False,
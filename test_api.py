@@ -42,6 +42,24 @@ def auth_headers(client):
     return {}
 
 
+@pytest.fixture
+def query_counter():
+    """Collect the SQL statements issued while a test runs"""
+    from sqlalchemy import event
+    from extensions import db
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _record)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', _record)
+
+
 class TestAuthRoutes:
     """Test authentication endpoints"""
     
@@ -74,7 +92,21 @@ class TestAuthRoutes:
         assert response.status_code == 401
         data = json.loads(response.data)
         assert data['success'] is False
-    
+
+    def test_login_failures_look_the_same(self, client):
+        """Unknown username and wrong password get the same response"""
+        unknown = client.post('/api/auth/login', json={
+            'username': 'no-such-user',
+            'password': 'wrong'
+        })
+        wrong = client.post('/api/auth/login', json={
+            'username': 'admin',
+            'password': 'wrong'
+        })
+
+        assert unknown.status_code == wrong.status_code == 401
+        assert json.loads(unknown.data) == json.loads(wrong.data)
+
     def test_login_missing_fields(self, client):
         """Test login with missing fields"""
         response = client.post('/api/auth/login', json={
@@ -112,6 +144,111 @@ class TestAuthRoutes:
             if response.status_code == 200:
                 data = json.loads(response.data)
                 assert 'access_token' in data
+    
+    def test_token_refresh_reuses_fresh_token(self, client):
+        """Refresh hands back the still-fresh access token until logout"""
+        response = client.post('/api/auth/login', json={
+            'username': 'admin',
+            'password': 'admin123'
+        })
+        assert response.status_code == 200
+        tokens = json.loads(response.data)['data']
+        refresh_headers = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+        
+        response = client.post('/api/auth/refresh', headers=refresh_headers)
+        access_token = json.loads(response.data)['data']['access_token']
+        assert access_token == tokens['access_token']
+        
+        client.post('/api/auth/logout', headers={'Authorization': f'Bearer {access_token}'})
+        response = client.post('/api/auth/login', json={
+            'username': 'admin',
+            'password': 'admin123'
+        })
+        assert json.loads(response.data)['data']['access_token'] != access_token
+
+    def test_token_reuse_follows_stored_credentials(self, client):
+        """A credential change written by another worker stops the reuse here"""
+        from extensions import db
+        from models.user import User
+
+        response = client.post('/api/auth/login', json={
+            'username': 'admin',
+            'password': 'admin123'
+        })
+        tokens = json.loads(response.data)['data']
+        refresh_headers = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+
+        with app.app_context():
+            user = User.query.filter_by(username='admin').first()
+            original_pin_hash = user.pin_hash
+            user.set_pin('9512')
+            db.session.commit()
+        try:
+            response = client.post('/api/auth/refresh', headers=refresh_headers)
+            assert json.loads(response.data)['data']['access_token'] != tokens['access_token']
+        finally:
+            with app.app_context():
+                user = User.query.filter_by(username='admin').first()
+                user.pin_hash = original_pin_hash
+                db.session.commit()
+
+    def test_repeat_login_skips_update(self, client, auth_headers, query_counter):
+        """A second login within a minute doesn't rewrite last_login"""
+        response = client.post('/api/auth/login', json={
+            'username': 'admin',
+            'password': 'admin123'
+        })
+        assert response.status_code == 200
+        assert not [s for s in query_counter if s.lstrip().upper().startswith('UPDATE')]
+
+    def _login(self, client):
+        response = client.post('/api/auth/login', json={
+            'username': 'admin',
+            'password': 'admin123'
+        })
+        return json.loads(response.data)['data']
+
+    def test_logout_revokes_session_tokens(self, client):
+        """Logout blocks that session's access and refresh tokens, not other devices'"""
+        tokens = self._login(client)
+        other = self._login(client)
+        access_headers = {'Authorization': f"Bearer {tokens['access_token']}"}
+        client.post('/api/auth/logout', headers=access_headers)
+
+        response = client.get('/api/auth/me', headers=access_headers)
+        assert response.status_code == 401
+        assert json.loads(response.data)['error'] == 'token_revoked'
+        response = client.post('/api/auth/refresh',
+                               headers={'Authorization': f"Bearer {tokens['refresh_token']}"})
+        assert response.status_code == 401
+        assert json.loads(response.data)['error'] == 'token_revoked'
+
+        response = client.get('/api/auth/me',
+                              headers={'Authorization': f"Bearer {other['access_token']}"})
+        assert response.status_code == 200
+        response = client.post('/api/auth/refresh',
+                               headers={'Authorization': f"Bearer {other['refresh_token']}"})
+        assert response.status_code == 200
+
+    def test_logout_all_revokes_every_session(self, client):
+        """Logout-all blocks the tokens of every device, new logins still work"""
+        tokens = self._login(client)
+        other = self._login(client)
+        client.post('/api/auth/logout-all',
+                    headers={'Authorization': f"Bearer {tokens['access_token']}"})
+
+        response = client.get('/api/auth/me',
+                              headers={'Authorization': f"Bearer {other['access_token']}"})
+        assert response.status_code == 401
+        response = client.post('/api/auth/refresh',
+                               headers={'Authorization': f"Bearer {other['refresh_token']}"})
+        assert response.status_code == 401
+
+        # Logging in again right away gives tokens that work
+        tokens = self._login(client)
+        response = client.post('/api/auth/refresh',
+                               headers={'Authorization': f"Bearer {tokens['refresh_token']}"})
+        assert response.status_code == 200
 
 
 class TestProductRoutes:
@@ -315,6 +452,99 @@ class TestUserRoutes:
         assert response.status_code in [200, 201, 400, 403]
 
 
+@pytest.fixture
+def activity_logs():
+    """Three throwaway logs, two of them sharing a timestamp"""
+    from datetime import datetime
+    from extensions import db
+    from models.user import ActivityLog
+    
+    stamp = datetime.now().replace(microsecond=0)
+    with app.app_context():
+        logs = [ActivityLog(action='cursor test', created_at=stamp) for _ in range(2)]
+        logs.append(ActivityLog(action='cursor test'))
+        db.session.add_all(logs)
+        db.session.commit()
+        ids = [log.id for log in logs]
+    yield ids
+    with app.app_context():
+        ActivityLog.query.filter(ActivityLog.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+class TestActivityLogRoutes:
+    """Test activity log endpoints"""
+    
+    def _all_pages(self, client, auth_headers, limit):
+        ids, cursor = [], {}
+        while True:
+            response = client.get('/api/activity-logs/', headers=auth_headers,
+                                  query_string={'limit': limit, **cursor})
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            ids += [log['id'] for log in data['data']]
+            cursor = data['next_cursor']
+            if not cursor:
+                return ids
+            assert len(ids) < 10000, 'cursor is not advancing'
+    
+    def test_activity_logs_cursor_pages(self, client, auth_headers, activity_logs):
+        """Following next_cursor visits every log exactly once, newest first"""
+        ids = self._all_pages(client, auth_headers, limit=1)
+        assert len(ids) == len(set(ids))
+        assert set(activity_logs) <= set(ids)
+    
+    def test_activity_logs_cursor_same_second(self, client, auth_headers, activity_logs):
+        """Logs sharing a created_at are split across pages by id"""
+        ids = self._all_pages(client, auth_headers, limit=1)
+        tied = activity_logs[:2]
+        # Same timestamp: the higher id comes first
+        assert ids.index(tied[1]) < ids.index(tied[0])
+    
+    def test_activity_logs_bulk_archive_restore(self, client, auth_headers, activity_logs):
+        """One request archives (then restores) every listed log"""
+        for action in ('archive', 'restore'):
+            response = client.post('/api/activity-logs/bulk',
+                                  json={'ids': activity_logs, 'action': action},
+                                  headers=auth_headers)
+            assert response.status_code == 200
+            assert json.loads(response.data)['data']['affected'] == len(activity_logs)
+        
+        response = client.post('/api/activity-logs/bulk',
+                              json={'ids': activity_logs, 'action': 'shred'},
+                              headers=auth_headers)
+        assert response.status_code == 400
+    
+    def test_activity_logs_invalid_cursor(self, client, auth_headers):
+        """A malformed cursor is rejected"""
+        response = client.get('/api/activity-logs/?before_ts=yesterday&before_id=1',
+                              headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestHealthRoutes:
+    """Test liveness/readiness probes"""
+    
+    def test_health_live(self, client):
+        """Liveness never depends on startup work"""
+        response = client.get('/api/health/live')
+        assert response.status_code == 200
+    
+    def test_health_ready(self, client):
+        """Readiness is 503 until the startup schema patch is done, then 200"""
+        from app import READY
+        
+        was_ready = READY.is_set()
+        try:
+            READY.clear()
+            assert client.get('/api/health/ready').status_code == 503
+            READY.set()
+            assert client.get('/api/health/ready').status_code == 200
+        finally:
+            if not was_ready:
+                READY.clear()
+
+
 class TestErrorHandling:
     """Test API error handling"""
     
@@ -376,6 +606,125 @@ class TestValidation:
                               headers=auth_headers)
         
         assert response.status_code in [400, 422]
+    
+    def test_create_transaction_unknown_product(self, client, auth_headers):
+        """An unknown product is rejected before the item is read further"""
+        response = client.post('/api/transactions',
+                              json={'items': [{'product_id': 999999}],
+                                    'subtotal': 0, 'total_amount': 0,
+                                    'payment_method': 'cash', 'amount_received': 0},
+                              headers=auth_headers)
+        
+        assert response.status_code == 400
+
+
+class TestCustomerTransactionCount:
+    """customers.transaction_count follows its transactions"""
+    
+    def test_count_follows_create_reassign_delete(self):
+        """Create, reassign and single delete adjust the count; bulk writes don't"""
+        import secrets
+        from sqlalchemy import update
+        from extensions import db
+        from models.customer import Customer
+        from models.transaction import Transaction
+        from models.user import User
+        
+        def counts():
+            db.session.expire_all()
+            return [db.session.get(Customer, c.id).transaction_count for c in (first, second)]
+        
+        with app.app_context():
+            suffix = secrets.token_hex(4)
+            first = Customer(name=f'Count A {suffix}')
+            second = Customer(name=f'Count B {suffix}')
+            db.session.add_all([first, second])
+            db.session.commit()
+            user_id = User.query.filter_by(username='admin').first().id
+            
+            try:
+                sales = [
+                    Transaction(customer_id=first.id, user_id=user_id, subtotal=1,
+                                total_amount=1, payment_method='cash', amount_received=1)
+                    for _ in range(3)
+                ]
+                db.session.add_all(sales)
+                db.session.commit()
+                assert counts() == [3, 0]
+                
+                sales[0].customer_id = second.id
+                db.session.commit()
+                assert counts() == [2, 1]
+                
+                db.session.delete(sales[1])
+                db.session.commit()
+                assert counts() == [1, 1]
+                
+                # Bulk statements leave the counts to the caller
+                db.session.execute(
+                    update(Transaction)
+                    .where(Transaction.customer_id == first.id)
+                    .values(customer_id=None)
+                )
+                db.session.commit()
+                assert counts() == [1, 1]
+            finally:
+                db.session.rollback()
+                Transaction.query.filter(
+                    Transaction.customer_id.in_([first.id, second.id])
+                ).delete(synchronize_session=False)
+                Customer.query.filter(Customer.id.in_([first.id, second.id])).delete()
+                db.session.commit()
+
+
+class TestTimestamps:
+    """Database-side timestamps compare correctly with Python datetimes"""
+    
+    def test_local_now_round_trip(self):
+        """A row matches a bound copy of its own created_at, not below it"""
+        from extensions import db
+        from models.user import ActivityLog
+        
+        with app.app_context():
+            log = ActivityLog(action='timestamp round trip')
+            db.session.add(log)
+            db.session.commit()
+            try:
+                db.session.refresh(log)
+                same = ActivityLog.query.filter(ActivityLog.id == log.id)
+                assert same.filter(ActivityLog.created_at == log.created_at).count() == 1
+                assert same.filter(ActivityLog.created_at < log.created_at).count() == 0
+            finally:
+                db.session.delete(log)
+                db.session.commit()
+
+
+class TestQueryCounts:
+    """List endpoints issue a fixed number of queries, not one per row"""
+    
+    def test_products_list_query_count(self, client, auth_headers, query_counter):
+        """Products list: count + page (category joined in)"""
+        response = client.get('/api/products/?per_page=50', headers=auth_headers)
+        assert response.status_code == 200
+        assert len(query_counter) <= 3, query_counter
+    
+    def test_transactions_list_query_count(self, client, auth_headers, query_counter):
+        """Transactions list: count + page + items"""
+        response = client.get('/api/transactions/?per_page=50', headers=auth_headers)
+        assert response.status_code == 200
+        assert len(query_counter) <= 4, query_counter
+    
+    def test_loyalty_members_list_query_count(self, client, auth_headers, query_counter):
+        """Loyalty members list: count + page (customer and tier joined in)"""
+        response = client.get('/api/loyalty/members?per_page=50', headers=auth_headers)
+        assert response.status_code == 200
+        assert len(query_counter) <= 3, query_counter
+    
+    def test_current_user_query_count(self, client, auth_headers, query_counter):
+        """Current user: one primary-key lookup, no lazy loads from to_dict"""
+        response = client.get('/api/auth/me', headers=auth_headers)
+        assert response.status_code == 200
+        assert len(query_counter) == 1, query_counter
 
 
 if __name__ == '__main__':
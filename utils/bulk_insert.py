@@ -0,0 +1,43 @@
+"""Idempotent multi-row INSERT helpers.
+
+Used by the seed scripts: re-running them must not duplicate rows.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from extensions import db
+
+
+def insert_missing(model, rows, key):
+    """Insert `rows` for `model` in one statement, skipping rows whose unique
+    `key` column already exists.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING (Postgres/SQLite) or INSERT ...
+    ON DUPLICATE KEY UPDATE key = key (MySQL), so concurrent runs can't race.
+    Unlike INSERT IGNORE, the MySQL form only skips duplicates; truncation,
+    bad foreign keys and NULLs in NOT NULL columns still raise.
+    Returns the number of rows actually inserted.
+    """
+    if not rows:
+        return 0
+
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        # SQLAlchemy connects with CLIENT_FOUND_ROWS, so the no-op update of
+        # a duplicate counts as an affected row; count the duplicates first.
+        column = getattr(model, key)
+        existing = db.session.scalar(
+            select(func.count()).select_from(model).where(column.in_([row[key] for row in rows]))
+        )
+        db.session.execute(mysql.insert(model).values(rows).on_duplicate_key_update({key: column}))
+        return len(rows) - existing
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(model).values(rows).on_conflict_do_nothing(index_elements=[key])
+    else:
+        raise RuntimeError(f"insert_missing: unsupported dialect {dialect!r}")
+
+    return db.session.execute(stmt).rowcount
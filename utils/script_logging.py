@@ -0,0 +1,31 @@
+"""Logging setup for command-line scripts (seeding, maintenance).
+
+Output is buffered in memory and written to stdout in one go when the buffer
+fills, an error is logged, or the process exits — so progress messages don't
+cost a write syscall each in between DB work.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+from logging.handlers import MemoryHandler
+
+
+def get_script_logger(name: str) -> logging.Logger:
+    """Return a logger that prints bare messages to stdout via a buffer."""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter('%(message)s'))
+        # logging.shutdown() (registered atexit) flushes what's left.
+        logger.addHandler(MemoryHandler(capacity=1000, flushLevel=logging.ERROR, target=stream))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def flush_script_logger(logger: logging.Logger) -> None:
+    """Write out buffered messages now (e.g. before prompting for input)."""
+    for handler in logger.handlers:
+        handler.flush()
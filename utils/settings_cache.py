@@ -0,0 +1,56 @@
+"""Per-worker caches of typed setting values.
+
+Settings are read on hot paths (checkout, redemption, reports) but change
+rarely, so each worker keeps them for a short TTL. The routes that write a
+setting invalidate the matching cache after committing.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from utils.ttl_cache import TTLCache
+
+# Application settings (routes/settings.py fills and invalidates this one)
+app_settings_cache = TTLCache(ttl=30)
+
+# Loyalty program settings
+loyalty_settings_cache = TTLCache(ttl=30)
+
+
+class _JsonText(str):
+    """Raw text of a JSON-typed setting, kept in a cache instead of the parsed value."""
+
+
+def cache_value(setting) -> Any:
+    """What a cache keeps for `setting`: its typed value, or its JSON text.
+
+    Parsed JSON is mutable and deep-copying it costs more than parsing the
+    text again, so JSON settings are cached as text and parsed per reader.
+    """
+    if setting.setting_type == 'json':
+        return _JsonText(setting.setting_value or '')
+    return setting.get_value()
+
+
+def copy_value(value: Any) -> Any:
+    """Return a cached `value` for one caller (JSON settings parsed afresh)."""
+    if isinstance(value, _JsonText):
+        try:
+            return json.loads(value or '{}')
+        except ValueError:
+            return {}
+    return value
+
+
+def _load_loyalty_settings() -> dict[str, Any]:
+    from models.loyalty import LoyaltySetting
+
+    return {s.setting_key: cache_value(s) for s in LoyaltySetting.query.all()}
+
+
+def get_loyalty_setting(key: str, default: Any = None) -> Any:
+    """Get a typed loyalty setting value by key."""
+    values = loyalty_settings_cache.get_or_load('all', _load_loyalty_settings)
+    return copy_value(values.get(key, default))
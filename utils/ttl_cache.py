@@ -0,0 +1,43 @@
+"""Small in-process cache for rarely-changing lookups (settings).
+
+Each gunicorn worker holds its own copy: a write made through this worker
+invalidates it at once, a write made through another worker shows up here
+when the entry expires.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """Thread-safe key -> value cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, calling `loader()` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        # Load outside the lock; two threads racing on a miss both just query.
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop `key`, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)